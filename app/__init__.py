@@ -14,7 +14,12 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    from app import storage, sharding
+    storage.configure(app)
+    sharding.configure(app)
     db.init_app(app)
+    storage.init_app(app)
+    sharding.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'main.login'
     login_manager.login_message = 'Veuillez vous connecter pour accéder à cette page.'
@@ -24,8 +29,17 @@ def create_app(config_class=Config):
     from app import routes
     app.register_blueprint(routes.bp)
     
-    with app.app_context():
-        db.create_all()
+    from app import cache, protocol, sessions
+    cache.init_app(app)
+    protocol.init_app(app)
+    sessions.init_app(app)
+    
+    # Le schéma est créé par une étape explicite (python manage.py init-db),
+    # sauf pour les bases éphémères (tests, SQLite en mémoire)
+    if app.config.get('AUTO_CREATE_SCHEMA'):
+        from app import schema
+        with app.app_context():
+            schema.upgrade(echo=lambda message: None)
     
     return app
 
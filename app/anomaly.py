@@ -0,0 +1,192 @@
+"""
+Détection de jeu automatisé et de collusion
+Statistiques glissantes par joueur, alimentées par les coups validés, sans
+requête supplémentaire sur le chemin d'un coup
+"""
+import bisect
+import math
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+
+
+CARD_WINDOW = 60  # Dernières cartes prises en compte pour l'entropie
+OPPONENT_WINDOW = 50  # Dernières parties prises en compte pour les adversaires
+RESPONSE_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)  # Bornes de l'histogramme (s)
+FAST_BUCKETS = 2  # Classes « réponse quasi instantanée » (< 0,5 s)
+HISTOGRAM_DECAY = 0.98  # Oubli progressif : ~50 derniers coups
+MAX_PLAYERS = 50000  # Joueurs suivis (les moins récents sont oubliés)
+
+MIN_MOVES = 30  # Coups avant de juger cartes et rythme
+MIN_GAMES = 10  # Parties avant de juger les adversaires
+LOW_ENTROPY = 1.0  # Bits, sur log2(3) ≈ 1,58 pour un tirage uniforme
+FAST_SHARE = 0.5
+TIMING_PEAK = 0.8  # Part de la classe dominante de l'histogramme
+REPEAT_SHARE = 0.5  # Part des parties contre le même adversaire
+ONE_SIDED = 0.8  # Résultats presque toujours dans le même sens
+
+
+class PlayerStats:
+    """
+    Fenêtres glissantes d'un joueur, en mémoire constante
+
+    Cartes et adversaires : files bornées avec compteurs tenus à jour à
+    l'entrée et à la sortie. Temps de réponse : histogramme à classes
+    fixes dont les effectifs décroissent à chaque coup.
+    """
+    __slots__ = ('moves', 'cards', 'card_counts', 'histogram', 'opponents', 'results')
+
+    def __init__(self):
+        self.moves = 0
+        self.cards = deque(maxlen=CARD_WINDOW)
+        self.card_counts = {}
+        self.histogram = [0.0] * (len(RESPONSE_BUCKETS) + 1)
+        self.opponents = deque(maxlen=OPPONENT_WINDOW)
+        self.results = deque(maxlen=OPPONENT_WINDOW)  # True si victoire
+
+    def add_move(self, card, response_time):
+        self.moves += 1
+        if len(self.cards) == self.cards.maxlen:
+            evicted = self.cards[0]
+            self.card_counts[evicted] -= 1
+        self.cards.append(card)
+        self.card_counts[card] = self.card_counts.get(card, 0) + 1
+
+        if response_time is not None:
+            histogram = self.histogram
+            for index in range(len(histogram)):
+                histogram[index] *= HISTOGRAM_DECAY
+            histogram[bisect.bisect_right(RESPONSE_BUCKETS, response_time)] += 1
+
+    def add_game(self, opponent_id, won):
+        self.opponents.append(opponent_id)
+        self.results.append(won)
+
+    def entropy(self):
+        """Entropie de la distribution des cartes récentes (bits)"""
+        total = len(self.cards)
+        if not total:
+            return None
+        return sum(
+            -count / total * math.log2(count / total)
+            for count in self.card_counts.values() if count
+        )
+
+    def timing(self):
+        """(part des réponses rapides, part de la classe dominante) ou (None, None)"""
+        total = sum(self.histogram)
+        if not total:
+            return None, None
+        return sum(self.histogram[:FAST_BUCKETS]) / total, max(self.histogram) / total
+
+    def top_opponent(self):
+        """(adversaire le plus fréquent, part des parties, taux de victoire contre lui)"""
+        if not self.opponents:
+            return None, None, None
+        counts = {}
+        for opponent_id in self.opponents:
+            counts[opponent_id] = counts.get(opponent_id, 0) + 1
+        opponent_id = max(counts, key=counts.get)
+        wins = sum(won for other, won in zip(self.opponents, self.results) if other == opponent_id)
+        return opponent_id, counts[opponent_id] / len(self.opponents), wins / counts[opponent_id]
+
+
+class AnomalyMonitor:
+    """
+    Statistiques de tous les joueurs actifs de ce processus
+
+    Alimenté après commit par les routes de jeu ; les signaux ne sont
+    calculés qu'à la consultation (page d'administration).
+    """
+
+    def __init__(self, max_players=MAX_PLAYERS):
+        self._players = OrderedDict()  # user_id -> PlayerStats, du moins au plus récent
+        self._max_players = max_players
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._players)
+
+    def _stats(self, user_id):
+        stats = self._players.get(user_id)
+        if stats is None:
+            stats = self._players[user_id] = PlayerStats()
+            if len(self._players) > self._max_players:
+                self._players.popitem(last=False)
+        else:
+            self._players.move_to_end(user_id)
+        return stats
+
+    def record_move(self, user_id, card, since=None):
+        """
+        Enregistre un coup validé
+
+        Args:
+            user_id (int): Joueur
+            card (str): Carte jouée
+            since (datetime): Activité précédente de la partie (temps de réponse)
+        """
+        response_time = (datetime.utcnow() - since).total_seconds() if since else None
+        with self._lock:
+            self._stats(user_id).add_move(card, response_time)
+
+    def record_game(self, player1_id, player2_id, winner_id):
+        """Enregistre une partie terminée pour ses deux joueurs"""
+        if not player1_id or not player2_id:
+            return
+        with self._lock:
+            self._stats(player1_id).add_game(player2_id, winner_id == player1_id)
+            self._stats(player2_id).add_game(player1_id, winner_id == player2_id)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._players.pop(user_id, None)
+
+    def report(self):
+        """
+        Joueurs dont au moins un signal dépasse son seuil
+
+        Returns:
+            list: Dicts (user_id, signaux, flags), les plus suspects d'abord
+        """
+        with self._lock:
+            rows = [_signals(user_id, stats) for user_id, stats in self._players.items()]
+
+        flagged = [row for row in rows if row['flags']]
+        flagged.sort(key=lambda row: (-len(row['flags']), -row['moves']))
+        return flagged
+
+
+def _signals(user_id, stats):
+    """Signaux et alertes d'un joueur"""
+    entropy = stats.entropy()
+    fast_share, timing_peak = stats.timing()
+    opponent_id, repeat_share, win_rate = stats.top_opponent()
+
+    flags = []
+    if stats.moves >= MIN_MOVES:
+        if entropy is not None and entropy < LOW_ENTROPY:
+            flags.append('Cartes prévisibles')
+        if fast_share is not None and fast_share >= FAST_SHARE:
+            flags.append('Réponses instantanées')
+        if timing_peak is not None and timing_peak >= TIMING_PEAK:
+            flags.append('Rythme mécanique')
+    if len(stats.opponents) >= MIN_GAMES and repeat_share >= REPEAT_SHARE:
+        if win_rate >= ONE_SIDED or win_rate <= 1 - ONE_SIDED:
+            flags.append('Adversaire récurrent')
+
+    return {
+        'user_id': user_id,
+        'moves': stats.moves,
+        'games': len(stats.opponents),
+        'entropy': entropy,
+        'fast_share': fast_share,
+        'timing_peak': timing_peak,
+        'opponent_id': opponent_id,
+        'repeat_share': repeat_share,
+        'win_rate': win_rate,
+        'flags': flags,
+    }
+
+
+monitor = AnomalyMonitor()
@@ -0,0 +1,232 @@
+"""
+Opérations d'administration en masse
+Suppressions par lots en SQL ensembliste, sans charger les objets ORM
+"""
+from sqlalchemy import select, delete, update, or_
+from app import db, sharding, storage, tournament
+from app.models import (
+    User, Game, Turn, GameEvent, GameSnapshot, ProfileStats, HeadToHead, Tournament, TournamentEntry
+)
+
+
+CHUNK_SIZE = 500
+
+
+def _chunks(ids, size):
+    """Découpe une liste d'IDs en lots de taille fixe"""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _next_game_ids(condition, chunk_size):
+    """
+    Retourne le prochain lot d'IDs de parties correspondant à une condition
+
+    Seuls les IDs transitent : aucune partie n'est chargée en mémoire.
+
+    Args:
+        condition: Expression SQLAlchemy filtrant la table games
+        chunk_size (int): Taille du lot
+
+    Returns:
+        list: IDs de parties (vide quand il n'en reste plus)
+    """
+    return db.session.execute(
+        select(Game.id).where(condition).order_by(Game.id).limit(chunk_size)
+    ).scalars().all()
+
+
+def _close_tournament_games(game_ids, leavers=()):
+    """
+    Clôt les parties de tournoi en cours avant leur suppression
+
+    Sans cela, la ronde attendrait indéfiniment des parties disparues.
+    L'adversaire d'un joueur supprimé (`leavers`) gagne par forfait ; une
+    partie supprimée pour elle-même compte comme abandonnée.
+    """
+    games = db.session.execute(
+        select(Game.id, Game.player1_id, Game.player2_id)
+        .where(Game.id.in_(game_ids), Game.tournament_id.isnot(None), Game.status == 'ongoing')
+    ).all()
+
+    results = []
+    for game in games:
+        stayers = [uid for uid in (game.player1_id, game.player2_id) if uid not in leavers]
+        results.append((game.id, stayers[0] if len(stayers) == 1 else None))
+    tournament.record_results(results)
+
+
+def _delete_game_chunk(game_ids, leavers=()):
+    """Supprime un lot de parties et leurs tours, retourne le nombre de parties"""
+    _close_tournament_games(game_ids, leavers)
+    db.session.execute(delete(Turn).where(Turn.game_id.in_(game_ids)))
+    db.session.execute(delete(GameEvent).where(GameEvent.game_id.in_(game_ids)))
+    db.session.execute(delete(GameSnapshot).where(GameSnapshot.game_id.in_(game_ids)))
+    result = db.session.execute(delete(Game).where(Game.id.in_(game_ids)))
+    return result.rowcount
+
+
+def delete_games(game_ids, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Supprime des parties (et leurs tours) par lots
+
+    Args:
+        game_ids (list): IDs des parties à supprimer
+        chunk_size (int): Nombre de parties par transaction
+        progress (callable): Appelé avec (supprimées, total) après chaque lot
+
+    Returns:
+        int: Nombre de parties supprimées
+    """
+    game_ids = sorted(set(game_ids))
+    total = len(game_ids)
+    deleted = 0
+
+    for chunk in _chunks(game_ids, chunk_size):
+        deleted += _delete_game_chunk(chunk)
+        db.session.commit()
+        if progress:
+            progress(deleted, total)
+
+    return deleted
+
+
+def delete_games_where(condition, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Supprime toutes les parties correspondant à une condition, par lots
+
+    Args:
+        condition: Expression SQLAlchemy filtrant la table games
+        chunk_size (int): Nombre de parties par transaction
+        progress (callable): Appelé avec (supprimées, total) après chaque lot
+
+    Returns:
+        int: Nombre de parties supprimées
+    """
+    total = sharding.count(select(db.func.count(Game.id)).where(condition))
+    deleted = 0
+
+    for count in _delete_games_where(condition, chunk_size):
+        deleted += count
+        db.session.commit()
+        if progress:
+            progress(deleted, total)
+
+    return deleted
+
+
+def _delete_games_where(condition, chunk_size, leavers=()):
+    """
+    Supprime par lots les parties correspondant à une condition, sans commit
+
+    Yields:
+        int: Nombre de parties supprimées par lot
+    """
+    # Les lignes supprimées sortent de la condition : le lot suivant repart du début
+    while True:
+        chunk = _next_game_ids(condition, chunk_size)
+        if not chunk:
+            break
+        yield _delete_game_chunk(chunk, leavers)
+
+
+def delete_users(user_ids, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Supprime des utilisateurs ainsi que toutes leurs parties, tours,
+    inscriptions aux tournois et statistiques de profil
+
+    Chaque lot d'utilisateurs est supprimé en une seule transaction : en
+    cas d'erreur, rien de ce lot n'est supprimé. Leurs parties de tournoi
+    en cours sont perdues par forfait.
+
+    Args:
+        user_ids (list): IDs des utilisateurs à supprimer
+        chunk_size (int): Taille des lots
+        progress (callable): Appelé avec (supprimés, total) après chaque lot
+
+    Returns:
+        tuple: (utilisateurs supprimés, parties supprimées)
+    """
+    user_ids = sorted(set(user_ids))
+    total = len(user_ids)
+    deleted_users = 0
+    deleted_games = 0
+
+    for chunk in _chunks(user_ids, chunk_size):
+        try:
+            # Une seule transaction pour tout le lot, verrou d'écriture compris
+            storage.begin_write()
+            # Désinscrits d'abord : une ronde relancée par un forfait ne les apparie plus
+            db.session.execute(delete(TournamentEntry).where(TournamentEntry.user_id.in_(chunk)))
+            db.session.execute(
+                update(Tournament).where(Tournament.winner_id.in_(chunk)).values(winner_id=None)
+                .execution_options(synchronize_session=False)
+            )
+            games = sum(_delete_games_where(
+                or_(Game.player1_id.in_(chunk), Game.player2_id.in_(chunk)),
+                chunk_size, leavers=set(chunk)
+            ))
+            db.session.execute(delete(ProfileStats).where(ProfileStats.user_id.in_(chunk)))
+            db.session.execute(delete(HeadToHead).where(
+                or_(HeadToHead.user_id.in_(chunk), HeadToHead.opponent_id.in_(chunk))
+            ))
+            result = db.session.execute(delete(User).where(User.id.in_(chunk)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        deleted_games += games
+        deleted_users += result.rowcount
+        if progress:
+            progress(deleted_users, total)
+
+    return deleted_users, deleted_games
+
+
+def purge_guests(exclude_ids=(), chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Supprime tous les comptes invités et leurs parties
+
+    Args:
+        exclude_ids (iterable): IDs à conserver (ex: l'admin connecté)
+        chunk_size (int): Taille des lots
+        progress (callable): Appelé avec (supprimés, total) après chaque lot
+
+    Returns:
+        tuple: (utilisateurs supprimés, parties supprimées)
+    """
+    condition = User.is_guest.is_(True)
+    if exclude_ids:
+        condition = condition & User.id.notin_(list(exclude_ids))
+
+    total = db.session.execute(select(db.func.count(User.id)).where(condition)).scalar()
+    deleted_users = 0
+    deleted_games = 0
+
+    while True:
+        chunk = db.session.execute(
+            select(User.id).where(condition).order_by(User.id).limit(chunk_size)
+        ).scalars().all()
+        if not chunk:
+            break
+        users, games = delete_users(chunk, chunk_size=chunk_size)
+        deleted_users += users
+        deleted_games += games
+        if progress:
+            progress(deleted_users, total)
+
+    return deleted_users, deleted_games
+
+
+def purge_waiting_games(chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Supprime toutes les parties abandonnées en attente d'adversaire
+
+    Args:
+        chunk_size (int): Taille des lots
+        progress (callable): Appelé avec (supprimées, total) après chaque lot
+
+    Returns:
+        int: Nombre de parties supprimées
+    """
+    return delete_games_where(Game.status == 'waiting', chunk_size=chunk_size, progress=progress)
@@ -0,0 +1,138 @@
+"""
+Cache HTTP et cache de fragments rendus
+ETag/Last-Modified, URLs statiques versionnées, fragments Jinja en mémoire
+"""
+import hashlib
+import os
+import threading
+import time
+from flask import request, current_app
+from flask_login import current_user
+
+
+# Pages dont la réponse est rendue conditionnelle (ETag / 304)
+CONDITIONAL_ENDPOINTS = {'main.index', 'main.leaderboard'}
+
+
+class FragmentCache:
+    """
+    Cache en mémoire de fragments HTML rendus
+
+    Chaque fragment est conservé jusqu'à son invalidation explicite ou
+    l'expiration de son TTL (filet de sécurité quand plusieurs workers
+    tournent : l'invalidation n'est visible que dans le processus local).
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_render(self, name, render, ttl):
+        """
+        Retourne un fragment en cache ou le rend et le mémorise
+
+        Args:
+            name (str): Nom du fragment
+            render (callable): Fonction sans argument retournant le HTML
+            ttl (int): Durée de vie en secondes
+
+        Returns:
+            tuple: (html, timestamp de rendu)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry and now - entry[1] < ttl:
+            return entry
+
+        entry = (render(), now)
+        with self._lock:
+            self._entries[name] = entry
+        return entry
+
+    def invalidate(self, name):
+        """Invalide un fragment"""
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def clear(self):
+        """Invalide tous les fragments"""
+        with self._lock:
+            self._entries.clear()
+
+
+fragments = FragmentCache()
+
+_fingerprints = {}
+
+
+def static_fingerprint(filename):
+    """
+    Calcule l'empreinte courte d'un fichier statique
+
+    Le résultat est mémorisé tant que la date de modification ne change pas.
+
+    Args:
+        filename (str): Chemin relatif au dossier static
+
+    Returns:
+        str or None: Empreinte hexadécimale ou None si le fichier n'existe pas
+    """
+    path = os.path.join(current_app.static_folder, filename)
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:12]
+    _fingerprints[path] = (mtime, digest)
+    return digest
+
+
+def _add_static_fingerprint(endpoint, values):
+    """Ajoute ?v=<empreinte> aux URLs générées pour les fichiers statiques"""
+    if endpoint != 'static' or 'v' in values or 'filename' not in values:
+        return
+    fingerprint = static_fingerprint(values['filename'])
+    if fingerprint:
+        values['v'] = fingerprint
+
+
+def _set_cache_headers(response):
+    """Pose les en-têtes de cache selon le type de ressource"""
+    if request.method != 'GET' or response.status_code != 200:
+        return response
+
+    if request.endpoint == 'static':
+        if 'v' in request.args:
+            max_age = current_app.config['STATIC_MAX_AGE']
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            response.cache_control.immutable = True
+        return response
+
+    if request.endpoint in CONDITIONAL_ENDPOINTS:
+        # Anonyme sans cookie : page identique pour tous, partageable par un CDN
+        if not current_user.is_authenticated and not request.cookies:
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config['PAGE_MAX_AGE']
+        else:
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        response.add_etag()
+        response.make_conditional(request)
+
+    return response
+
+
+def init_app(app):
+    """Branche le versionnage des fichiers statiques et les en-têtes de cache"""
+    app.url_defaults(_add_static_fingerprint)
+    app.after_request(_set_cache_headers)
@@ -0,0 +1,277 @@
+"""
+Journal d'événements des parties (mode EVENT_SOURCING)
+Chaque coup est un INSERT en ajout seul ; l'état se déduit en rejouant les
+événements depuis le dernier instantané. La ligne games n'est mise à jour
+qu'en fin de partie (score, Bouffons, statut) : pendant le jeu, les
+lectures lui superposent l'état rejoué (project)
+"""
+import copy
+from datetime import datetime
+from sqlalchemy import select, insert, update, func, and_
+from sqlalchemy.exc import IntegrityError
+from app import db, storage
+from app.models import Game, GameEvent, GameSnapshot
+from app.utils import calculate_winner, update_score
+
+
+SNAPSHOT_INTERVAL = 20  # Un instantané tous les N événements
+
+STATE_FIELDS = (
+    'seq', 'turn_number', 'card1', 'card2', 'joker', 'winner',
+    'score1', 'score2', 'joker_used_p1', 'joker_used_p2',
+)
+
+
+class GameFold:
+    """
+    État d'une partie obtenu par repli de ses événements
+
+    Le dernier tour (complet ou en cours) est conservé tel quel, comme la
+    dernière ligne de la table turns en mode classique.
+    """
+
+    def __init__(self, **values):
+        self.seq = 0
+        self.turn_number = 0
+        self.card1 = None
+        self.card2 = None
+        self.joker = False
+        self.winner = None  # 0 égalité, 1 ou 2, None si tour en cours
+        self.score1 = 0
+        self.score2 = 0
+        self.joker_used_p1 = False
+        self.joker_used_p2 = False
+        self.last_at = None  # Date du dernier coup
+        self.previous_at = None  # Date du coup précédent (temps de réponse)
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    @property
+    def turn_open(self):
+        """True si un tour est entamé mais pas encore résolu"""
+        return self.turn_number > 0 and not (self.card1 and self.card2)
+
+    @property
+    def waiting_for(self):
+        """Joueur attendu : 1, 2 ou 'both'"""
+        if not self.turn_open:
+            return 'both'
+        return 2 if self.card1 else 1
+
+    def apply(self, player, card, joker, at=None):
+        """Applique un coup à l'état (règles de utils), joué à la date `at`"""
+        if not self.turn_open:
+            self.turn_number += 1
+            self.card1 = self.card2 = None
+            self.joker = False
+            self.winner = None
+
+        setattr(self, f'card{player}', card)
+        if joker:
+            self.joker = True
+            setattr(self, f'joker_used_p{player}', True)
+
+        if self.card1 and self.card2:
+            self.winner = calculate_winner(self.card1, self.card2, self.joker)
+            update_score(self, self.winner)
+
+        self.seq += 1
+        self.previous_at, self.last_at = self.last_at, at
+
+    def check_move(self, player, use_joker):
+        """
+        Vérifie qu'un coup est recevable
+
+        Returns:
+            str or None: Message d'erreur, None si le coup est valide
+        """
+        if self.score1 >= 3 or self.score2 >= 3:
+            return 'La partie n\'est pas en cours'
+        if self.turn_open and getattr(self, f'card{player}'):
+            return 'Vous avez déjà joué dans ce tour'
+        if use_joker and getattr(self, f'joker_used_p{player}'):
+            return 'Vous avez déjà utilisé votre Bouffon'
+        return None
+
+    def last_turn(self, game):
+        """Dernier tour au format de l'API game_state (None si aucun)"""
+        if not self.turn_number:
+            return None
+        winner_id = {1: game.player1_id, 2: game.player2_id}.get(self.winner)
+        return {
+            'turn_number': self.turn_number,
+            'player1_card': self.card1,
+            'player2_card': self.card2,
+            'winner_id': winner_id,
+            'joker_used': self.joker
+        }
+
+
+def load_states(game_ids):
+    """
+    Reconstruit l'état de plusieurs parties en deux requêtes
+
+    Dernier instantané de chaque partie, puis seulement les événements
+    postérieurs, rejoués dans l'ordre.
+
+    Args:
+        game_ids (iterable): IDs des parties
+
+    Returns:
+        dict: game_id -> GameFold
+    """
+    game_ids = list(game_ids)
+    states = {game_id: GameFold() for game_id in game_ids}
+    if not game_ids:
+        return states
+
+    latest = (
+        select(GameSnapshot.game_id, func.max(GameSnapshot.seq).label('seq'))
+        .where(GameSnapshot.game_id.in_(game_ids))
+        .group_by(GameSnapshot.game_id)
+        .subquery()
+    )
+
+    columns = [getattr(GameSnapshot, name) for name in STATE_FIELDS]
+    for row in db.session.execute(
+        select(GameSnapshot.game_id, GameSnapshot.created_at, *columns)
+        .join(latest, and_(GameSnapshot.game_id == latest.c.game_id, GameSnapshot.seq == latest.c.seq))
+    ):
+        states[row.game_id] = GameFold(
+            last_at=row.created_at, **{name: getattr(row, name) for name in STATE_FIELDS}
+        )
+
+    for game_id, player, card, joker, created_at in db.session.execute(
+        select(GameEvent.game_id, GameEvent.player, GameEvent.card, GameEvent.joker, GameEvent.created_at)
+        .outerjoin(latest, latest.c.game_id == GameEvent.game_id)
+        .where(GameEvent.game_id.in_(game_ids), GameEvent.seq > func.coalesce(latest.c.seq, 0))
+        .order_by(GameEvent.game_id, GameEvent.seq)
+    ):
+        states[game_id].apply(player, card, joker, created_at)
+
+    return states
+
+
+def load_state(game_id):
+    """Reconstruit l'état d'une partie"""
+    return load_states([game_id])[game_id]
+
+
+def project(game, state):
+    """
+    Reporte le score et les Bouffons d'un état rejoué sur une partie
+
+    Args:
+        game: Objet Game (écrit au commit) ou ligne de lecture
+        state (GameFold): État rejoué
+    """
+    game.score1, game.score2 = state.score1, state.score2
+    game.joker_used_p1, game.joker_used_p2 = state.joker_used_p1, state.joker_used_p2
+
+
+def project_states(states):
+    """
+    Reporte des états rejoués sur la table games (sans commit)
+
+    Args:
+        states (dict): game_id -> GameFold, tel que renvoyé par load_states
+    """
+    for game_id, state in states.items():
+        if not state.seq:
+            continue
+        db.session.execute(
+            update(Game).where(Game.id == game_id)
+            .values(score1=state.score1, score2=state.score2,
+                    joker_used_p1=state.joker_used_p1, joker_used_p2=state.joker_used_p2)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _snapshot(game_id, state):
+    """Enregistre un instantané de l'état courant"""
+    values = {name: getattr(state, name) for name in STATE_FIELDS}
+    db.session.execute(insert(GameSnapshot).values(game_id=game_id, created_at=datetime.utcnow(), **values))
+
+
+def play(game_id, player, card, use_joker, snapshot_interval=SNAPSHOT_INTERVAL, attempts=3):
+    """
+    Enregistre un coup : un seul INSERT dans le journal
+
+    Aucune ligne n'est verrouillée : si l'adversaire a pris le même numéro
+    d'ordre entre-temps, la contrainte d'unicité rejette l'insertion (seule
+    annulée) et le coup est revalidé sur l'état complété des coups
+    manquants. Ne valide pas la transaction :
+    l'appelant commit (avec la projection sur la table games si le coup
+    termine la partie).
+
+    Args:
+        game_id (int): ID de la partie
+        player (int): 1 ou 2
+        card (str): Carte jouée
+        use_joker (bool): Bouffon joué avec la carte
+        snapshot_interval (int): Fréquence des instantanés (en événements)
+        attempts (int): Nombre d'essais en cas de coup concurrent
+
+    Returns:
+        tuple: (GameFold après le coup, message d'erreur ou None)
+    """
+    state = load_state(game_id)
+    for _ in range(attempts):
+        error = state.check_move(player, use_joker)
+        if error:
+            return state, error
+
+        now = datetime.utcnow()
+        move = copy.copy(state)
+        move.apply(player, card, use_joker, now)
+        try:
+            # Point de sauvegarde : un conflit n'annule que l'INSERT, la
+            # transaction et le verrou pris par l'appelant sont conservés
+            with db.session.begin_nested():
+                db.session.execute(insert(GameEvent).values(
+                    game_id=game_id, seq=move.seq, player=player, card=card,
+                    joker=bool(use_joker), created_at=now
+                ))
+        except IntegrityError:
+            _catch_up(game_id, state)
+            continue
+
+        if snapshot_interval and move.seq % snapshot_interval == 0:
+            _snapshot(game_id, move)
+        return move, None
+
+    return state, 'Coup concurrent, veuillez réessayer'
+
+
+def _catch_up(game_id, state):
+    """
+    Applique à un état les événements écrits après lui
+
+    Lecture verrouillante : elle voit les coups validés par d'autres
+    transactions depuis le début de la nôtre (MySQL, REPEATABLE READ).
+    """
+    statement = (
+        select(GameEvent.player, GameEvent.card, GameEvent.joker, GameEvent.created_at)
+        .where(GameEvent.game_id == game_id, GameEvent.seq > state.seq)
+        .order_by(GameEvent.seq)
+    )
+    if not storage.is_sqlite():
+        statement = statement.with_for_update(read=True)
+    for player, card, joker, created_at in db.session.execute(statement):
+        state.apply(player, card, joker, created_at)
+
+
+def replay(game_id, chunk_size=1000):
+    """
+    Rejoue tout le journal d'une partie depuis le début, sans instantané
+
+    Yields:
+        tuple: (GameEvent, GameFold après l'événement)
+    """
+    state = GameFold()
+    for event in db.session.execute(
+        select(GameEvent).where(GameEvent.game_id == game_id).order_by(GameEvent.seq)
+        .execution_options(yield_per=chunk_size)
+    ).scalars():
+        state.apply(event.player, event.card, event.joker, event.created_at)
+        yield event, state
@@ -0,0 +1,246 @@
+"""
+Matchmaking par niveau
+Index en mémoire des joueurs en attente, trié par classement Elo
+"""
+import bisect
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import select, update, delete
+from app import db, storage
+from app.models import User, Game
+
+
+BASE_WINDOW = 100  # Écart Elo accepté immédiatement
+WIDEN_PER_SECOND = 10  # Élargissement de la fenêtre par seconde d'attente
+MAX_WINDOW = 800  # Écart maximal, atteint après 70 s d'attente
+REFRESH_INTERVAL = 5  # Resynchronisation avec la base (parties créées par d'autres workers)
+
+
+def search_window(waited):
+    """
+    Écart de classement accepté après un temps d'attente
+
+    Args:
+        waited (float): Secondes d'attente
+
+    Returns:
+        float: Écart Elo maximal
+    """
+    return min(BASE_WINDOW + WIDEN_PER_SECOND * max(waited, 0), MAX_WINDOW)
+
+
+class MatchmakingIndex:
+    """
+    Parties en attente triées par classement de leur créateur
+
+    Recherche par dichotomie puis parcours vers l'extérieur, borné par
+    MAX_WINDOW : O(log n) pour trouver la zone, quel que soit le nombre de
+    joueurs en file. La base reste l'arbitre : une entrée n'est qu'un
+    candidat, confirmé par un UPDATE conditionnel.
+    """
+
+    def __init__(self):
+        self._keys = []  # (rating, game_id), trié
+        self._entries = {}  # game_id -> (rating, user_id, created_at)
+        self._lock = threading.Lock()
+        self._refreshed_at = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, game_id, user_id, rating, created_at):
+        """Ajoute une partie en attente"""
+        with self._lock:
+            self._remove(game_id)
+            self._entries[game_id] = (rating, user_id, created_at)
+            bisect.insort(self._keys, (rating, game_id))
+
+    def remove(self, game_id):
+        """Retire une partie de l'index"""
+        with self._lock:
+            self._remove(game_id)
+
+    def _remove(self, game_id):
+        entry = self._entries.pop(game_id, None)
+        if entry is None:
+            return
+        key = (entry[0], game_id)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def find(self, rating, user_id, waited=0, exclude=()):
+        """
+        Cherche la partie en attente la plus proche en classement
+
+        Une partie convient si l'écart tient dans la fenêtre du joueur qui
+        attend depuis le plus longtemps (lui ou le créateur de la partie).
+
+        Args:
+            rating (float): Classement du joueur qui cherche
+            user_id (int): ID du joueur (ses propres parties sont ignorées)
+            waited (float): Secondes d'attente du joueur qui cherche
+            exclude (iterable): IDs de parties à ignorer
+
+        Returns:
+            int or None: ID de la partie candidate
+        """
+        now = datetime.utcnow()
+        with self._lock:
+            keys = self._keys
+            right = bisect.bisect_left(keys, (rating, 0))
+            left = right - 1
+
+            while left >= 0 or right < len(keys):
+                left_gap = rating - keys[left][0] if left >= 0 else None
+                right_gap = keys[right][0] - rating if right < len(keys) else None
+
+                if right_gap is None or (left_gap is not None and left_gap <= right_gap):
+                    gap, game_id = left_gap, keys[left][1]
+                    left -= 1
+                else:
+                    gap, game_id = right_gap, keys[right][1]
+                    right += 1
+
+                if gap > MAX_WINDOW:
+                    break
+
+                _, owner_id, created_at = self._entries[game_id]
+                if owner_id == user_id or game_id in exclude:
+                    continue
+
+                owner_waited = (now - created_at).total_seconds()
+                if gap <= search_window(max(waited, owner_waited)):
+                    return game_id
+
+        return None
+
+    def refresh(self, force=False):
+        """Recharge l'index depuis la base si la dernière synchronisation est ancienne"""
+        if not force and time.time() - self._refreshed_at < REFRESH_INTERVAL:
+            return
+
+        # Deux requêtes plutôt qu'une jointure : parties et joueurs peuvent vivre sur des bases distinctes
+        rows = db.session.execute(
+            select(Game.id, Game.player1_id, Game.created_at)
+            .where(Game.status == 'waiting', Game.player2_id.is_(None))
+        ).all()
+        ratings = dict(db.session.execute(
+            select(User.id, User.rating).where(User.id.in_({row.player1_id for row in rows}))
+        ).all()) if rows else {}
+
+        entries = {
+            row.id: (ratings.get(row.player1_id) or 0, row.player1_id, row.created_at or datetime.utcnow())
+            for row in rows
+            if row.player1_id in ratings
+        }
+        with self._lock:
+            self._entries = entries
+            self._keys = sorted((entry[0], game_id) for game_id, entry in entries.items())
+            self._refreshed_at = time.time()
+
+
+index = MatchmakingIndex()
+
+
+def _claim(game_id, user):
+    """
+    Rejoint une partie en attente si elle l'est toujours (UPDATE conditionnel)
+
+    Returns:
+        bool: True si la partie a été rejointe
+    """
+    result = db.session.execute(
+        update(Game)
+        .where(Game.id == game_id, Game.status == 'waiting', Game.player2_id.is_(None),
+               Game.player1_id != user.id)
+        .values(player2_id=user.id, status='ongoing', last_activity_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def join_waiting_game(user, waited=0, exclude=(), attempts=5):
+    """
+    Cherche un adversaire de niveau proche et rejoint sa partie
+
+    Les candidats périmés (déjà rejoints ailleurs) sont retirés de l'index
+    et la recherche recommence, dans la limite de quelques tentatives.
+
+    Args:
+        user: Objet User qui cherche
+        waited (float): Secondes d'attente du joueur
+        exclude (iterable): IDs de parties à ignorer
+        attempts (int): Nombre maximal de candidats essayés
+
+    Returns:
+        int or None: ID de la partie rejointe (non validée : l'appelant commit)
+    """
+    storage.begin_write()
+    index.refresh()
+    rating = user.rating or 0
+
+    for _ in range(attempts):
+        game_id = index.find(rating, user.id, waited=waited, exclude=exclude)
+        if game_id is None:
+            return None
+
+        index.remove(game_id)
+        if _claim(game_id, user):
+            return game_id
+
+    return None
+
+
+def register_waiting(game, user):
+    """Ajoute une partie nouvellement créée à l'index"""
+    index.add(game.id, user.id, user.rating or 0, game.created_at or datetime.utcnow())
+
+
+def merge_waiting(game, user):
+    """
+    Pendant l'attente, tente de rejoindre une autre partie compatible
+
+    La fenêtre de recherche s'élargit avec l'ancienneté de la partie. Les
+    verrous ne sont pris que si l'index propose un candidat. En cas de
+    succès, la partie d'attente du joueur est supprimée dans la même
+    transaction (si personne ne l'a rejointe entre-temps).
+
+    Args:
+        game: Partie en attente du joueur
+        user: Objet User propriétaire de la partie
+
+    Returns:
+        int or None: ID de la partie rejointe
+    """
+    game_id = game.id
+    waited = (datetime.utcnow() - (game.created_at or datetime.utcnow())).total_seconds()
+    if waited <= 0:
+        return None
+
+    # Recherche sans verrou : la plupart des vérifications ne trouvent personne
+    index.refresh()
+    if index.find(user.rating or 0, user.id, waited=waited, exclude=(game_id,)) is None:
+        return None
+
+    # Verrou sur sa propre partie : personne ne peut la rejoindre pendant la fusion
+    own = db.session.execute(
+        storage.for_update(select(Game.id).where(Game.id == game_id, Game.status == 'waiting'))
+    ).scalar()
+    if own is None:
+        db.session.rollback()
+        return None
+
+    joined = join_waiting_game(user, waited=waited, exclude=(game_id,))
+    if joined is None:
+        db.session.rollback()
+        return None
+
+    db.session.execute(
+        delete(Game).where(Game.id == game_id, Game.status == 'waiting')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    index.remove(game_id)
+    return joined
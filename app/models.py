@@ -1,6 +1,7 @@
 """
 Modèles de base de données SQLAlchemy
-User, Game, Turn
+User, Game, Turn, GameEvent, GameSnapshot, Tournament, ProfileStats, HeadToHead
+(et leurs tables de travail pour le recalcul des compteurs)
 """
 from app import db
 from flask_login import UserMixin
@@ -18,6 +19,7 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, default=False)  # ← NOUVEAU CHAMP ADMIN
     wins = db.Column(db.Integer, default=0)
     games_played = db.Column(db.Integer, default=0)
+    rating = db.Column(db.Float, default=1200.0, server_default='1200')  # Elo
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     games_as_player1 = db.relationship('Game', foreign_keys='Game.player1_id', backref='player1', lazy='dynamic')
@@ -43,11 +45,19 @@ class Game(db.Model):
     player2_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     score1 = db.Column(db.Integer, default=0)
     score2 = db.Column(db.Integer, default=0)
-    status = db.Column(db.String(20), default='waiting')  # 'waiting', 'ongoing', 'finished'
+    status = db.Column(db.String(20), default='waiting')  # 'waiting', 'ongoing', 'finished', 'abandoned'
     joker_used_p1 = db.Column(db.Boolean, default=False)
     joker_used_p2 = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     finished_at = db.Column(db.DateTime, nullable=True)
+    last_activity_at = db.Column(db.DateTime, nullable=True)  # Dernier coup joué (délai de tour)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournaments.id'), nullable=True, index=True)
+    tournament_round = db.Column(db.Integer, nullable=True)
+    tournament_slot = db.Column(db.Integer, nullable=True)  # Position dans le tableau de la ronde
+    
+    __table_args__ = (
+        db.Index('ix_games_status_activity', 'status', 'last_activity_at'),
+    )
     
     turns = db.relationship('Turn', backref='game', lazy='dynamic', order_by='Turn.id')
     
@@ -60,7 +70,7 @@ class Turn(db.Model):
     __tablename__ = 'turns'
     
     id = db.Column(db.Integer, primary_key=True)
-    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False, index=True)
     turn_number = db.Column(db.Integer, nullable=False)
     player1_card = db.Column(db.String(20), nullable=True)
     player2_card = db.Column(db.String(20), nullable=True)
@@ -72,4 +82,154 @@ class Turn(db.Model):
     winner = db.relationship('User', foreign_keys=[winner_id])
     
     def __repr__(self):
-        return f'<Turn {self.id} of Game {self.game_id}>'
\ No newline at end of file
+        return f'<Turn {self.id} of Game {self.game_id}>'
+
+
+
+class GameEvent(db.Model):
+    """Coup joué (carte, Bouffon éventuel), en ajout seul : mode EVENT_SOURCING"""
+    __tablename__ = 'game_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)  # Numéro d'ordre dans la partie (1, 2, ...)
+    player = db.Column(db.SmallInteger, nullable=False)  # 1 ou 2
+    card = db.Column(db.String(20), nullable=False)
+    joker = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Deux coups concurrents ne peuvent pas prendre le même numéro
+        db.UniqueConstraint('game_id', 'seq', name='uq_game_events_seq'),
+    )
+    
+    def __repr__(self):
+        return f'<GameEvent {self.seq} of Game {self.game_id}>'
+
+
+class GameSnapshot(db.Model):
+    """Instantané de l'état d'une partie après l'événement seq"""
+    __tablename__ = 'game_snapshots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, db.ForeignKey('games.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    turn_number = db.Column(db.Integer, nullable=False)
+    card1 = db.Column(db.String(20), nullable=True)  # Dernier tour (complet ou en cours)
+    card2 = db.Column(db.String(20), nullable=True)
+    joker = db.Column(db.Boolean, default=False)
+    winner = db.Column(db.SmallInteger, nullable=True)  # 0 égalité, 1 ou 2, None si tour en cours
+    score1 = db.Column(db.Integer, default=0)
+    score2 = db.Column(db.Integer, default=0)
+    joker_used_p1 = db.Column(db.Boolean, default=False)
+    joker_used_p2 = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('game_id', 'seq', name='uq_game_snapshots_seq'),
+    )
+    
+    def __repr__(self):
+        return f'<GameSnapshot {self.seq} of Game {self.game_id}>'
+
+class Tournament(db.Model):
+    """Modèle de tournoi (système suisse ou élimination directe)"""
+    __tablename__ = 'tournaments'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    format = db.Column(db.String(20), nullable=False)  # 'swiss', 'elimination'
+    status = db.Column(db.String(20), default='running')  # 'running', 'finished'
+    current_round = db.Column(db.Integer, default=0)
+    total_rounds = db.Column(db.Integer, nullable=False)
+    pending_games = db.Column(db.Integer, nullable=True)  # Parties de la ronde courante non encore reportées
+    winner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    entries = db.relationship('TournamentEntry', backref='tournament', lazy='dynamic')
+    winner = db.relationship('User', foreign_keys=[winner_id])
+    
+    def __repr__(self):
+        return f'<Tournament {self.id}: {self.name}>'
+
+
+class TournamentEntry(db.Model):
+    """Inscription d'un joueur à un tournoi, avec ses points"""
+    __tablename__ = 'tournament_entries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    tournament_id = db.Column(db.Integer, db.ForeignKey('tournaments.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    seed = db.Column(db.Integer, nullable=False)
+    points = db.Column(db.Integer, default=0)
+    byes = db.Column(db.Integer, default=0)
+    eliminated = db.Column(db.Boolean, default=False)
+    
+    user = db.relationship('User')
+    
+    __table_args__ = (
+        db.UniqueConstraint('tournament_id', 'user_id'),
+        db.Index('ix_tournament_entries_standings', 'tournament_id', 'points'),
+    )
+    
+    def __repr__(self):
+        return f'<TournamentEntry {self.user_id} in Tournament {self.tournament_id}>'
+
+
+class ProfileStats(db.Model):
+    """Compteurs de profil d'un joueur, incrémentés à chaque tour résolu (voir app/profiles.py)"""
+    __tablename__ = 'profile_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    mage_played = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    chevalier_played = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    loup_played = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    turns_won = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    turns_lost = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    turns_drawn = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    jokers_played = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    joker_turns_won = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    def __repr__(self):
+        return f'<ProfileStats {self.user_id}>'
+
+
+class HeadToHead(db.Model):
+    """Bilan d'un joueur contre un adversaire (parties terminées)"""
+    __tablename__ = 'head_to_head'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    opponent_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    games = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    wins = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        # Adversaires les plus fréquents d'un joueur, lus dans l'ordre de l'index
+        db.Index('ix_head_to_head_user_games', 'user_id', 'games'),
+    )
+    
+    def __repr__(self):
+        return f'<HeadToHead {self.user_id} vs {self.opponent_id}>'
+
+
+def _staging_table(model):
+    """
+    Table de travail de même structure qu'une table de compteurs, sans
+    clés étrangères ni index : profiles.backfill la remplit par lots avant
+    de basculer son contenu dans la table réelle
+    """
+    return db.Table(
+        f'{model.__tablename__}_staging', db.metadata,
+        *[
+            db.Column(
+                column.name, column.type, primary_key=column.primary_key, nullable=column.nullable,
+                server_default=column.server_default.arg if column.server_default is not None else None
+            )
+            for column in model.__table__.columns
+        ]
+    )
+
+
+profile_stats_staging = _staging_table(ProfileStats)
+head_to_head_staging = _staging_table(HeadToHead)
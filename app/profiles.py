@@ -0,0 +1,234 @@
+"""
+Statistiques de profil des joueurs
+Compteurs agrégés par joueur (profile_stats) et par adversaire
+(head_to_head), incrémentés à chaque tour résolu et à chaque fin de
+partie : une page de profil se lit en deux requêtes sur clé primaire,
+sans parcourir l'historique des tours
+"""
+from sqlalchemy import select, insert, delete, func, or_
+from app import db, sharding, storage
+from app.models import (
+    User, Game, Turn, GameEvent, ProfileStats, HeadToHead, profile_stats_staging, head_to_head_staging,
+)
+from app.events import GameFold
+
+
+CHUNK_SIZE = 500  # Parties traitées par transaction lors du recalcul
+OPEN_STATUSES = ('waiting', 'ongoing')  # Parties dont les tours peuvent encore changer
+
+CARD_COLUMNS = {'Mage': 'mage_played', 'Chevalier': 'chevalier_played', 'Loup': 'loup_played'}
+COUNTERS = tuple(CARD_COLUMNS.values()) + (
+    'turns_won', 'turns_lost', 'turns_drawn', 'jokers_played', 'joker_turns_won',
+)
+
+
+def _add_turn(totals, user_id, card, result, joker):
+    """Ajoute un tour résolu aux compteurs d'un joueur (result : 1 gagné, -1 perdu, 0 égalité)"""
+    counters = totals.get(user_id)
+    if counters is None:
+        counters = totals[user_id] = dict.fromkeys(COUNTERS, 0)
+    counters[CARD_COLUMNS[card]] += 1
+    counters[('turns_drawn', 'turns_won', 'turns_lost')[result]] += 1
+    if joker:
+        counters['jokers_played'] += 1
+        counters['joker_turns_won'] += result == 1
+
+
+def record_turns(turns, table=ProfileStats.__table__):
+    """
+    Incrémente les compteurs de plusieurs tours résolus (sans commit)
+
+    Args:
+        turns (iterable): (player1_id, player2_id, card1, card2, winner, joker_player)
+            winner : 0 égalité, 1 ou 2 ; joker_player : 1, 2 ou None
+        table: Table des compteurs (table de travail lors du recalcul)
+    """
+    totals = {}
+    for player1_id, player2_id, card1, card2, winner, joker_player in turns:
+        result1 = {0: 0, 1: 1, 2: -1}[winner]
+        _add_turn(totals, player1_id, card1, result1, joker_player == 1)
+        if player2_id is not None:
+            _add_turn(totals, player2_id, card2, -result1, joker_player == 2)
+
+    rows = [dict(counters, user_id=user_id) for user_id, counters in sorted(totals.items())]
+    storage.add_counters(table, ('user_id',), rows)
+
+
+def record_turn(player1_id, player2_id, card1, card2, winner, joker_player=None):
+    """Incrémente les compteurs d'un tour résolu (sans commit)"""
+    record_turns([(player1_id, player2_id, card1, card2, winner, joker_player)])
+
+
+def record_games(games, table=HeadToHead.__table__):
+    """
+    Ajoute des parties terminées aux bilans face à face (sans commit)
+
+    Args:
+        games (iterable): (player1_id, player2_id, winner_id)
+        table: Table des bilans (table de travail lors du recalcul)
+    """
+    totals = {}
+    for player1_id, player2_id, winner_id in games:
+        if player1_id is None or player2_id is None:
+            continue
+        for user_id, opponent_id in ((player1_id, player2_id), (player2_id, player1_id)):
+            counters = totals.setdefault((user_id, opponent_id), {'games': 0, 'wins': 0})
+            counters['games'] += 1
+            counters['wins'] += winner_id == user_id
+
+    rows = [
+        dict(counters, user_id=user_id, opponent_id=opponent_id)
+        for (user_id, opponent_id), counters in sorted(totals.items())
+    ]
+    storage.add_counters(table, ('user_id', 'opponent_id'), rows)
+
+
+def record_game(player1_id, player2_id, winner_id):
+    """Ajoute une partie terminée aux bilans face à face (sans commit)"""
+    record_games([(player1_id, player2_id, winner_id)])
+
+
+def _resolved_turns(games, bind_arguments):
+    """
+    Tours résolus d'un lot de parties, modes classique et EVENT_SOURCING
+
+    Les tours sont lus par l'index sur turns.game_id ; le journal est
+    rejoué partie par partie (index unique game_id, seq).
+    """
+    players = {game.id: (game.player1_id, game.player2_id) for game in games}
+    game_ids = list(players)
+
+    for game_id, card1, card2, winner_id, joker_used_by in db.session.execute(
+        select(Turn.game_id, Turn.player1_card, Turn.player2_card, Turn.winner_id, Turn.joker_used_by)
+        .where(Turn.game_id.in_(game_ids), Turn.player1_card.isnot(None), Turn.player2_card.isnot(None)),
+        bind_arguments=bind_arguments
+    ):
+        player1_id, player2_id = players[game_id]
+        winner = 1 if winner_id == player1_id else 2 if winner_id is not None else 0
+        joker_player = None if joker_used_by is None else 1 if joker_used_by == player1_id else 2
+        yield player1_id, player2_id, card1, card2, winner, joker_player
+
+    state = joker_player = previous = None
+    for game_id, player, card, joker in db.session.execute(
+        select(GameEvent.game_id, GameEvent.player, GameEvent.card, GameEvent.joker)
+        .where(GameEvent.game_id.in_(game_ids))
+        .order_by(GameEvent.game_id, GameEvent.seq),
+        bind_arguments=bind_arguments
+    ):
+        if game_id != previous:
+            state, previous = GameFold(), game_id
+        if not state.turn_open:
+            joker_player = None
+        state.apply(player, card, joker)
+        if joker:
+            joker_player = player
+        if state.winner is not None:
+            yield (*players[game_id], state.card1, state.card2, state.winner, joker_player)
+
+
+def _winner_id(game):
+    """Vainqueur d'une partie terminée (forfaits compris : score porté à 3)"""
+    if (game.score1 or 0) >= 3:
+        return game.player1_id
+    if (game.score2 or 0) >= 3:
+        return game.player2_id
+    return None
+
+
+def _count_games(games, bind_arguments):
+    """
+    Ajoute les tours et les parties terminées d'un lot aux tables de travail (sans commit)
+
+    Returns:
+        int: Tours comptés
+    """
+    turns = list(_resolved_turns(games, bind_arguments))
+    record_turns(turns, profile_stats_staging)
+    record_games(
+        ((game.player1_id, game.player2_id, _winner_id(game)) for game in games if game.status == 'finished'),
+        head_to_head_staging
+    )
+    return len(turns)
+
+
+def _select_games(*criteria):
+    return (
+        select(Game.id, Game.player1_id, Game.player2_id, Game.status, Game.score1, Game.score2)
+        .where(*criteria).order_by(Game.id)
+    )
+
+
+def backfill(chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Recalcule tous les compteurs depuis l'historique des parties
+
+    Les totaux sont construits dans des tables de travail, par lots de
+    parties closes (pagination sur l'ID, shard par shard), une courte
+    transaction par lot : les coups joués pendant le recalcul ne sont pas
+    bloqués et la mémoire reste bornée. Les parties encore ouvertes et
+    celles créées depuis le début du recalcul sont comptées à la bascule,
+    sous verrou (storage.for_update) : leurs tours sont relus, puis le
+    contenu des tables de travail remplace les compteurs. Cette dernière
+    transaction ne dépend que du nombre de parties ouvertes et de joueurs ;
+    aucun tour n'y est perdu ni compté deux fois.
+
+    Args:
+        chunk_size (int): Parties par lot
+        progress (callable): Appelé avec (parties, tours) après chaque lot
+
+    Returns:
+        tuple: (parties parcourues, tours comptés)
+    """
+    staging = ((ProfileStats.__table__, profile_stats_staging), (HeadToHead.__table__, head_to_head_staging))
+    for _, work in staging:
+        db.session.execute(delete(work))
+    db.session.commit()
+
+    games_seen = turns_seen = 0
+    pending = []  # (bind_arguments, dernier ID au départ, parties ouvertes) par shard
+    for bind_arguments in sharding.each_shard():
+        bound = db.session.execute(select(func.max(Game.id)), bind_arguments=bind_arguments).scalar() or 0
+        open_ids = []
+        last_id = 0
+        while True:
+            games = db.session.execute(
+                _select_games(Game.id > last_id, Game.id <= bound).limit(chunk_size),
+                bind_arguments=bind_arguments
+            ).all()
+            if not games:
+                break
+            last_id = games[-1].id
+
+            open_ids.extend(game.id for game in games if game.status in OPEN_STATUSES)
+            turns_seen += _count_games([game for game in games if game.status not in OPEN_STATUSES], bind_arguments)
+            db.session.commit()
+
+            games_seen += len(games)
+            if progress:
+                progress(games_seen, turns_seen)
+        pending.append((bind_arguments, bound, open_ids))
+
+    try:
+        for bind_arguments, bound, open_ids in pending:
+            games = db.session.execute(
+                storage.for_update(_select_games(or_(Game.id > bound, Game.id.in_(open_ids)))),
+                bind_arguments=bind_arguments
+            ).all()
+            turns_seen += _count_games(games, bind_arguments)
+            games_seen += sum(1 for game in games if game.id > bound)
+
+        # Les joueurs supprimés pendant le recalcul n'ont plus de compteurs
+        players = select(User.id)
+        for live, work in staging:
+            criteria = [work.c[name].in_(players) for name in ('user_id', 'opponent_id') if name in work.c]
+            db.session.execute(delete(live))
+            db.session.execute(insert(live).from_select(list(work.c.keys()), select(work).where(*criteria)))
+            db.session.execute(delete(work))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if progress:
+        progress(games_seen, turns_seen)
+    return games_seen, turns_seen
@@ -0,0 +1,211 @@
+"""
+Protocole d'état de partie versionné
+Noms de champs compacts, diffs par version, compression gzip/brotli
+"""
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Dépendance optionnelle
+    brotli = None
+
+
+# Nom complet -> nom compact envoyé au client (voir expandState dans game.js)
+COMPACT_FIELDS = {
+    'status': 's',
+    'score1': 'a',
+    'score2': 'b',
+    'joker_used_p1': 'j1',
+    'joker_used_p2': 'j2',
+    'player1': 'n1',
+    'player2': 'n2',
+    'player1_id': 'i1',
+    'player2_id': 'i2',
+    'waiting_for': 'w',
+    'last_turn': 't',
+}
+
+# Ordre des valeurs du dernier tour, envoyé sous forme de liste
+LAST_TURN_FIELDS = ('turn_number', 'player1_card', 'player2_card', 'winner_id', 'joker_used')
+
+# En dessous de cette taille, la compression coûte plus qu'elle ne rapporte :
+# un état compact complet (~230 octets) est compressé, un diff ne l'est pas
+MIN_COMPRESS_SIZE = 200
+
+HISTORY_PER_GAME = 8
+HISTORY_MAX_GAMES = 2048
+
+
+def compact_state(state):
+    """
+    Convertit l'état complet d'une partie en représentation compacte
+
+    Args:
+        state (dict): État tel que renvoyé par l'ancien protocole
+
+    Returns:
+        dict: État avec noms de champs courts
+    """
+    compact = {}
+    for name, short in COMPACT_FIELDS.items():
+        value = state.get(name)
+        if name == 'last_turn' and value is not None:
+            value = [value[field] for field in LAST_TURN_FIELDS]
+        compact[short] = value
+    return compact
+
+
+def state_version(marker):
+    """
+    Calcule la version d'un état à partir de son marqueur
+
+    Args:
+        marker (Record): Marqueur lu par readmodels.state_marker
+
+    Returns:
+        int: Version non nulle
+    """
+    payload = '|'.join(str(getattr(marker, name)) for name in marker.columns)
+    return zlib.crc32(payload.encode('utf-8')) or 1
+
+
+def diff_state(old, new):
+    """
+    Retourne uniquement les champs modifiés entre deux états compacts
+
+    Args:
+        old (dict): État connu du client
+        new (dict): État actuel
+
+    Returns:
+        dict: Champs dont la valeur a changé
+    """
+    return {key: value for key, value in new.items() if old.get(key) != value}
+
+
+class StateHistory:
+    """
+    Derniers états envoyés, par partie, pour calculer les diffs
+
+    Mémoire bornée : quelques versions par partie, parties évincées par LRU.
+    Un client dont la version n'est plus connue reçoit l'état complet.
+    """
+
+    def __init__(self, per_game=HISTORY_PER_GAME, max_games=HISTORY_MAX_GAMES):
+        self.per_game = per_game
+        self.max_games = max_games
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, game_id, version, compact):
+        """
+        Mémorise l'état compact d'une version
+
+        Args:
+            game_id (int): ID de la partie
+            version (int): Version de l'état
+            compact (dict): État compact
+        """
+        with self._lock:
+            versions = self._games.pop(game_id, None)
+            if versions is None:
+                versions = OrderedDict()
+            self._games[game_id] = versions
+
+            versions.pop(version, None)
+            versions[version] = compact
+            while len(versions) > self.per_game:
+                versions.popitem(last=False)
+            while len(self._games) > self.max_games:
+                self._games.popitem(last=False)
+
+    def lookup(self, game_id, version):
+        """Retourne l'état compact d'une version connue, ou None"""
+        with self._lock:
+            versions = self._games.get(game_id)
+            if versions is None:
+                return None
+            return versions.get(version)
+
+
+history = StateHistory()
+
+
+def build_payload(game_id, version, state, since):
+    """
+    Construit la réponse du protocole versionné
+
+    L'appelant a déjà répondu 304 si `since` vaut `version` : l'état n'est
+    construit que lorsqu'il a changé.
+
+    Args:
+        game_id (int): ID de la partie
+        version (int): Version de l'état (state_version)
+        state (dict): État complet de la partie
+        since (int): Dernière version connue du client
+
+    Returns:
+        dict: Payload complet ou diff
+    """
+    compact = compact_state(state)
+    base = history.lookup(game_id, since)
+    history.remember(game_id, version, compact)
+
+    if base is None:
+        return {'v': version, 'full': compact}
+
+    return {'v': version, 'd': diff_state(base, compact)}
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Choisit l'encodage de compression accepté par le client
+
+    Args:
+        accept_encoding: En-tête Accept-Encoding parsé (werkzeug)
+
+    Returns:
+        str or None: 'br', 'gzip' ou None
+    """
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress_json(response):
+    """Compresse les réponses JSON volumineuses selon Accept-Encoding"""
+    if (response.status_code != 200
+            or response.mimetype != 'application/json'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        data = brotli.compress(data, quality=4)
+    else:
+        data = gzip.compress(data, compresslevel=5)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """Active la compression des réponses JSON"""
+    app.after_request(_compress_json)
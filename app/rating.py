@@ -0,0 +1,119 @@
+"""
+Classement Elo des joueurs
+Mise à jour incrémentale en fin de partie et recalcul complet en streaming
+"""
+import itertools
+from datetime import datetime
+from sqlalchemy import select, update
+from app import db, sharding
+from app.models import User, Game
+
+
+INITIAL_RATING = 1200.0
+K_FACTOR = 32
+
+
+def expected_score(rating_a, rating_b):
+    """
+    Probabilité de victoire attendue de A contre B
+
+    Args:
+        rating_a (float): Classement du joueur A
+        rating_b (float): Classement du joueur B
+
+    Returns:
+        float: Score attendu entre 0 et 1
+    """
+    return 1.0 / (1.0 + 10 ** ((rating_b - rating_a) / 400.0))
+
+
+def rating_delta(winner_rating, loser_rating, k=K_FACTOR):
+    """
+    Points Elo gagnés par le vainqueur (et perdus par le perdant)
+
+    Args:
+        winner_rating (float): Classement du vainqueur avant la partie
+        loser_rating (float): Classement du perdant avant la partie
+        k (int): Facteur K
+
+    Returns:
+        float: Variation de classement
+    """
+    return k * (1.0 - expected_score(winner_rating, loser_rating))
+
+
+def apply_result(winner, loser):
+    """
+    Met à jour les classements de deux joueurs après une partie
+
+    Args:
+        winner: Objet User vainqueur
+        loser: Objet User perdant
+    """
+    winner_rating = winner.rating if winner.rating is not None else INITIAL_RATING
+    loser_rating = loser.rating if loser.rating is not None else INITIAL_RATING
+
+    delta = rating_delta(winner_rating, loser_rating)
+    winner.rating = winner_rating + delta
+    loser.rating = loser_rating - delta
+
+
+def recompute_all(chunk_size=10000, progress=None):
+    """
+    Rejoue toutes les parties terminées pour recalculer les classements
+
+    Les parties sont lues en streaming (colonnes seules, par lots) dans
+    l'ordre de fin ; les classements sont tenus dans un dict puis écrits
+    en quelques UPDATE groupés par clé primaire.
+
+    Args:
+        chunk_size (int): Taille des lots de lecture et d'écriture
+        progress (callable): Appelé avec le nombre de parties rejouées
+
+    Returns:
+        tuple: (parties rejouées, joueurs classés)
+    """
+    ratings = {}
+    get = ratings.get
+    k = K_FACTOR
+    replayed = 0
+
+    # Fusion k-voies entre shards (simple parcours sans partitionnement)
+    stream = sharding.stream_sorted(
+        select(Game.finished_at, Game.id, Game.player1_id, Game.player2_id, Game.score1, Game.score2)
+        .where(Game.status == 'finished', Game.player2_id.isnot(None))
+        .order_by(Game.finished_at, Game.id),
+        key=lambda row: (row.finished_at or datetime.min, row.id),
+        chunk_size=chunk_size
+    )
+
+    while True:
+        rows = list(itertools.islice(stream, chunk_size))
+        if not rows:
+            break
+        for _, _, p1, p2, score1, score2 in rows:
+            if score1 >= 3:
+                winner, loser = p1, p2
+            elif score2 >= 3:
+                winner, loser = p2, p1
+            else:
+                continue
+
+            winner_rating = get(winner, INITIAL_RATING)
+            loser_rating = get(loser, INITIAL_RATING)
+            delta = k / (1.0 + 10 ** ((winner_rating - loser_rating) / 400.0))
+            ratings[winner] = winner_rating + delta
+            ratings[loser] = loser_rating - delta
+
+        replayed += len(rows)
+        if progress:
+            progress(replayed)
+
+    db.session.execute(update(User).values(rating=INITIAL_RATING))
+
+    items = [{'id': user_id, 'rating': value} for user_id, value in ratings.items()]
+    for start in range(0, len(items), chunk_size):
+        sharding.bulk_update(User, items[start:start + chunk_size])
+
+    db.session.commit()
+    return replayed, len(ratings)
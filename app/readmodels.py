@@ -0,0 +1,226 @@
+"""
+Modèles de lecture des pages de consultation
+Requêtes sur colonnes seules vers des lignes légères (__slots__), sans
+objets ORM ni carte d'identité
+"""
+from sqlalchemy import select, func
+from app import db, sharding
+from app.models import User, Game, Turn, GameEvent, ProfileStats, HeadToHead
+
+
+PLAYER_CHUNK = 500  # Joueurs chargés par requête IN
+
+
+class Record:
+    """
+    Ligne en lecture seule à attributs fixes
+
+    Ni __dict__ ni état ORM (InstanceState, historique des attributs) :
+    rien à suivre pour la session, rien à libérer pour le ramasse-miettes.
+    Les sous-classes listent leurs colonnes dans `columns`, dans l'ordre
+    du SELECT.
+    """
+    __slots__ = ()
+    columns = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.columns, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.columns)
+        return f'{type(self).__name__}({fields})'
+
+
+class PlayerRef(Record):
+    """Joueur cité par une partie (game.player1.username dans les templates)"""
+    __slots__ = columns = ('id', 'username')
+
+
+class UserRow(Record):
+    """Utilisateur tel qu'affiché par le classement et l'administration"""
+    __slots__ = columns = ('id', 'username', 'rating', 'wins', 'games_played', 'is_guest', 'is_admin', 'created_at')
+
+
+class GameRow(Record):
+    """Partie avec ses deux joueurs (None si absent)"""
+    columns = (
+        'id', 'player1_id', 'player2_id', 'score1', 'score2', 'status',
+        'joker_used_p1', 'joker_used_p2', 'created_at', 'finished_at', 'tournament_slot',
+    )
+    __slots__ = columns + ('player1', 'player2')
+
+
+class StateMarker(Record):
+    """Colonnes qui changent à chaque évolution de l'état d'une partie"""
+    __slots__ = columns = (
+        'player1_id', 'player2_id', 'status', 'score1', 'score2',
+        'joker_used_p1', 'joker_used_p2', 'last_activity_at', 'last_seq',
+    )
+
+
+class TurnRow(Record):
+    """Dernier tour d'une partie (mode classique)"""
+    __slots__ = columns = ('id', 'turn_number', 'player1_card', 'player2_card', 'winner_id', 'joker_used_by')
+
+
+class ProfileRow(Record):
+    """Compteurs de profil d'un joueur (voir app/profiles.py)"""
+    __slots__ = columns = (
+        'user_id', 'mage_played', 'chevalier_played', 'loup_played',
+        'turns_won', 'turns_lost', 'turns_drawn', 'jokers_played', 'joker_turns_won',
+    )
+
+    @property
+    def turns_played(self):
+        return self.turns_won + self.turns_lost + self.turns_drawn
+
+    def card_share(self, name):
+        """Part d'une carte parmi les tours joués (0 à 1)"""
+        played = getattr(self, f'{name}_played')
+        return played / self.turns_played if self.turns_played else 0
+
+    @property
+    def joker_win_rate(self):
+        return self.joker_turns_won / self.jokers_played if self.jokers_played else None
+
+
+class HeadToHeadRow(Record):
+    """Bilan contre un adversaire"""
+    __slots__ = columns = ('opponent_id', 'username', 'games', 'wins')
+
+
+def _select(model, record):
+    """SELECT des seules colonnes d'un Record"""
+    return select(*[getattr(model, name) for name in record.columns])
+
+
+def _attach_players(games):
+    """Renseigne player1/player2 en une requête par lot de joueurs"""
+    user_ids = sorted({
+        user_id for game in games for user_id in (game.player1_id, game.player2_id)
+        if user_id is not None
+    })
+
+    players = {}
+    for start in range(0, len(user_ids), PLAYER_CHUNK):
+        chunk = user_ids[start:start + PLAYER_CHUNK]
+        for row in db.session.execute(_select(User, PlayerRef).where(User.id.in_(chunk))):
+            players[row.id] = PlayerRef(*row)
+
+    for game in games:
+        game.player1 = players.get(game.player1_id)
+        game.player2 = players.get(game.player2_id)
+    return games
+
+
+def game(game_id):
+    """
+    Une partie et ses joueurs
+
+    Returns:
+        GameRow or None: Partie, None si elle n'existe pas
+    """
+    row = db.session.execute(_select(Game, GameRow).where(Game.id == game_id)).first()
+    if row is None:
+        return None
+    return _attach_players([GameRow(*row)])[0]
+
+
+def state_marker(game_id):
+    """
+    Marqueur de version de l'état d'une partie (une lecture par clé primaire)
+
+    Chaque coup modifie la ligne games (last_activity_at, scores) ou ajoute
+    un événement au journal : comparer le marqueur suffit à savoir si
+    l'état a changé, sans reconstruire ni relire les tours.
+
+    Returns:
+        StateMarker or None: Marqueur, None si la partie n'existe pas
+    """
+    last_seq = select(func.max(GameEvent.seq)).where(GameEvent.game_id == game_id).scalar_subquery()
+    row = db.session.execute(
+        select(*[getattr(Game, name) for name in StateMarker.columns[:-1]], last_seq)
+        .where(Game.id == game_id)
+    ).first()
+    return StateMarker(*row) if row is not None else None
+
+
+def games(*criteria, order_by, key, reverse=False, limit=None):
+    """
+    Parties triées, fusionnées entre les shards, avec leurs joueurs
+
+    Args:
+        *criteria: Conditions WHERE
+        order_by (tuple): Colonnes ORDER BY
+        key (callable): Clé de tri des lignes, identique à l'ORDER BY
+        reverse (bool): Tri décroissant
+        limit (int): Nombre maximal de parties
+
+    Returns:
+        list: GameRow
+    """
+    statement = _select(Game, GameRow).where(*criteria).order_by(*order_by)
+    if limit:
+        statement = statement.limit(limit)
+    rows = sharding.merge_sorted(statement, key=key, reverse=reverse, limit=limit, scalars=False)
+    return _attach_players([GameRow(*row) for row in rows])
+
+
+def users(*criteria, order_by=(), limit=None):
+    """
+    Utilisateurs (base globale)
+
+    Returns:
+        list: UserRow
+    """
+    statement = _select(User, UserRow).where(*criteria).order_by(*order_by)
+    if limit:
+        statement = statement.limit(limit)
+    return [UserRow(*row) for row in db.session.execute(statement)]
+
+
+def last_turn(game_id):
+    """
+    Dernier tour d'une partie, complet ou en cours
+
+    Returns:
+        TurnRow or None: Tour, None si aucun
+    """
+    row = db.session.execute(
+        _select(Turn, TurnRow).where(Turn.game_id == game_id).order_by(Turn.id.desc()).limit(1)
+    ).first()
+    return TurnRow(*row) if row is not None else None
+
+
+def profile(user_id):
+    """
+    Compteurs de profil d'un joueur (une lecture par clé primaire)
+
+    Returns:
+        ProfileRow: Compteurs, à zéro si le joueur n'a encore résolu aucun tour
+    """
+    row = db.session.execute(_select(ProfileStats, ProfileRow).where(ProfileStats.user_id == user_id)).first()
+    if row is None:
+        return ProfileRow(user_id, *[0] * (len(ProfileRow.columns) - 1))
+    return ProfileRow(*row)
+
+
+def head_to_head(user_id, limit=10):
+    """
+    Adversaires les plus fréquents d'un joueur
+
+    Lus dans l'ordre de l'index (user_id, games) : coût borné par `limit`,
+    pas par le nombre de parties jouées.
+
+    Returns:
+        list: HeadToHeadRow, du plus au moins affronté
+    """
+    statement = (
+        select(HeadToHead.opponent_id, User.username, HeadToHead.games, HeadToHead.wins)
+        .join(User, User.id == HeadToHead.opponent_id)
+        .where(HeadToHead.user_id == user_id)
+        .order_by(HeadToHead.games.desc())
+        .limit(limit)
+    )
+    return [HeadToHeadRow(*row) for row in db.session.execute(statement)]
@@ -1,11 +1,14 @@
 """
 Routes principales de l'application Battle of Roles
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, abort
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, session, abort, current_app, make_response
+from markupsafe import Markup
 from flask_login import login_user, logout_user, current_user, login_required
-from app import db
-from app.models import User, Game, Turn
-from app.forms import LoginForm, RegisterForm
+# Modules d'administration, de tournoi et de statistiques : importés dans
+# leurs vues, le démarrage d'un worker ne charge que le cœur du jeu
+from app import db, cache, protocol, readmodels, storage, matchmaking
+from app.scheduler import scheduler, sweep
+from app.models import User, Game, Turn, Tournament
 from app.utils import calculate_winner, update_score, check_victory, format_game_result
 from datetime import datetime
 import random
@@ -39,6 +42,7 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
+    from app.forms import LoginForm
     form = LoginForm()
     
     if form.validate_on_submit():
@@ -63,6 +67,7 @@ def register():
     if current_user.is_authenticated:
         return redirect(url_for('main.lobby'))
     
+    from app.forms import RegisterForm
     form = RegisterForm()
     
     if form.validate_on_submit():
@@ -116,12 +121,14 @@ def logout():
 @login_required
 def lobby():
     """Lobby de recherche de partie"""
+    storage.begin_write()
     old_waiting = Game.query.filter_by(
         player1_id=current_user.id,
         status='waiting'
     ).all()
     
     for old_game in old_waiting:
+        matchmaking.index.remove(old_game.id)
         db.session.delete(old_game)
     
     if old_waiting:
@@ -133,20 +140,18 @@ def lobby():
     ).first()
     
     if ongoing_game:
-        return redirect(url_for('main.game', game_id=ongoing_game.id))
+        closed, _ = sweep(current_app.config['TURN_TIMEOUT'], game_ids=[ongoing_game.id])
+        if not closed:
+            return redirect(url_for('main.game', game_id=ongoing_game.id))
+        flash('Votre partie précédente a expiré', 'info')
     
-    waiting_game = Game.query.filter(
-        Game.status == 'waiting',
-        Game.player1_id != current_user.id,
-        Game.player2_id.is_(None)
-    ).first()
+    waiting_game_id = matchmaking.join_waiting_game(current_user)
     
-    if waiting_game:
-        waiting_game.player2_id = current_user.id
-        waiting_game.status = 'ongoing'
+    if waiting_game_id:
         db.session.commit()
+        scheduler.touch(waiting_game_id)
         flash('Adversaire trouvé ! La partie commence.', 'success')
-        return redirect(url_for('main.game', game_id=waiting_game.id))
+        return redirect(url_for('main.game', game_id=waiting_game_id))
     
     new_game = Game(
         player1_id=current_user.id,
@@ -157,6 +162,7 @@ def lobby():
     )
     db.session.add(new_game)
     db.session.commit()
+    matchmaking.register_waiting(new_game, current_user)
     
     return render_template('lobby.html', game=new_game)
 
@@ -165,7 +171,10 @@ def lobby():
 @login_required
 def game(game_id):
     """Page de jeu"""
-    game = Game.query.get_or_404(game_id)
+    from app import events
+    game = readmodels.game(game_id)
+    if not game:
+        abort(404)
     
     valid_players = [game.player1_id]
     if game.player2_id:
@@ -177,6 +186,9 @@ def game(game_id):
     
     player_num = 1 if current_user.id == game.player1_id else 2
     
+    if current_app.config['EVENT_SOURCING'] and game.status == 'ongoing':
+        events.project(game, events.load_state(game_id))
+    
     return render_template('game.html', game=game, player_num=player_num)
 
 
@@ -193,19 +205,73 @@ def check_game_ready(game_id):
         if game.status == 'ongoing' and game.player2_id is not None and game.player1_id != game.player2_id:
             return jsonify({'ready': True, 'game_id': game.id})
         
+        # Fenêtre de niveau élargie avec l'attente : rejoindre une autre partie compatible
+        if game.status == 'waiting' and game.player1_id == current_user.id:
+            joined = matchmaking.merge_waiting(game, current_user)
+            if joined:
+                scheduler.touch(joined)
+                return jsonify({'ready': True, 'game_id': joined})
+        
         return jsonify({'ready': False})
         
     except Exception as e:
+        db.session.rollback()
         print(f"❌ Erreur dans check_game_ready: {e}")
         return jsonify({'ready': False, 'error': str(e)})
 
 
+def _last_turn_state(game):
+    """Joueur attendu et dernier tour lus dans la table turns (mode classique)"""
+    last_turn = readmodels.last_turn(game.id)
+    
+    waiting_for = None
+    if game.status == 'ongoing':
+        if not last_turn:
+            waiting_for = 'both'
+        elif last_turn.player1_card and last_turn.player2_card:
+            waiting_for = 'both'
+        elif last_turn.player1_card and not last_turn.player2_card:
+            waiting_for = 2
+        elif last_turn.player2_card and not last_turn.player1_card:
+            waiting_for = 1
+        else:
+            waiting_for = 'both'
+    
+    if not last_turn:
+        return waiting_for, None
+    
+    print(f"   Turn #{last_turn.turn_number} (ID:{last_turn.id}): P1={last_turn.player1_card}, P2={last_turn.player2_card}")
+    return waiting_for, {
+        'turn_number': last_turn.turn_number,
+        'player1_card': last_turn.player1_card,
+        'player2_card': last_turn.player2_card,
+        'winner_id': last_turn.winner_id,
+        'joker_used': last_turn.joker_used_by is not None
+    }
+
+
 @bp.route('/api/game/<int:game_id>/state')
 @login_required
 def game_state(game_id):
     """Retourne l'état actuel de la partie (API)"""
+    from app import events
     try:
-        game = Game.query.get(game_id)
+        # Protocole versionné : ?since=<version> -> 304 dès la lecture du marqueur
+        since = request.args.get('since', type=int)
+        version = None
+        if since is not None:
+            marker = readmodels.state_marker(game_id)
+            if not marker:
+                return jsonify({'error': 'Partie non trouvée'}), 404
+            if current_user.id not in (marker.player1_id, marker.player2_id):
+                return jsonify({'error': 'Non autorisé'}), 403
+            version = protocol.state_version(marker)
+            if since == version:
+                return '', 304
+        
+        # Lecture sur colonnes : toujours fraîche, sans objet ORM à expirer
+        # (même transaction que le marqueur : l'état correspond à sa version)
+        game = readmodels.game(game_id)
         
         if not game:
             return jsonify({'error': 'Partie non trouvée'}), 404
@@ -219,40 +285,20 @@ def game_state(game_id):
         
         player_num = 1 if current_user.id == game.player1_id else 2
         
-        db.session.expire_all()
+        if current_app.config['EVENT_SOURCING']:
+            fold = events.load_state(game_id)
+            waiting_for = fold.waiting_for if game.status == 'ongoing' else None
+            last_turn_data = fold.last_turn(game)
+            if game.status == 'ongoing':
+                events.project(game, fold)
+        else:
+            waiting_for, last_turn_data = _last_turn_state(game)
         
-        last_turn = Turn.query.filter_by(game_id=game_id).order_by(Turn.id.desc()).first()
+        print(f"🎮 Game #{game_id} - waiting_for: {waiting_for}, player: {player_num}")
         
-        waiting_for = None
-        if game.status == 'ongoing':
-            if not last_turn:
-                waiting_for = 'both'
-            elif last_turn.player1_card and last_turn.player2_card:
-                waiting_for = 'both'
-            elif last_turn.player1_card and not last_turn.player2_card:
-                waiting_for = 2
-            elif last_turn.player2_card and not last_turn.player1_card:
-                waiting_for = 1
-            else:
-                waiting_for = 'both'
+        player2_username = game.player2.username if game.player2 else "En attente..."
         
-        print(f"🎮 Game #{game_id} - waiting_for: {waiting_for}, player: {player_num}")
-        if last_turn:
-            print(f"   Turn #{last_turn.turn_number} (ID:{last_turn.id}): P1={last_turn.player1_card}, P2={last_turn.player2_card}")
-        
-        player2_username = game.player2.username if game.player2_id else "En attente..."
-        
-        last_turn_data = None
-        if last_turn:
-            last_turn_data = {
-                'turn_number': last_turn.turn_number,
-                'player1_card': last_turn.player1_card,
-                'player2_card': last_turn.player2_card,
-                'winner_id': last_turn.winner_id,
-                'joker_used': last_turn.joker_used_by is not None
-            }
-        
-        return jsonify({
+        state = {
             'status': game.status,
             'score1': game.score1,
             'score2': game.score2,
@@ -265,7 +311,12 @@ def game_state(game_id):
             'waiting_for': waiting_for,
             'last_turn': last_turn_data,
             'your_player_num': player_num
-        })
+        }
+        
+        if version is None:
+            return jsonify(state)
+        
+        return jsonify(protocol.build_payload(game_id, version, state, since))
     except Exception as e:
         print(f"❌ Erreur dans game_state: {e}")
         traceback.print_exc()
@@ -276,6 +327,7 @@ def game_state(game_id):
 @login_required
 def play_turn(game_id):
     """Jouer une carte (API)"""
+    from app import anomaly, profiles
     try:
         game = Game.query.get(game_id)
         if not game:
@@ -297,8 +349,15 @@ def play_turn(game_id):
         
         print(f"\n➡️ P{player_num} ({current_user.username}) joue {card} (Joker: {use_joker})")
         
-        db.session.expire(game)
-        db.session.refresh(game)
+        if current_app.config['EVENT_SOURCING']:
+            return _play_turn_event(game, player_num, card, use_joker)
+        
+        # Un seul coup à la fois par partie (FOR UPDATE, ou BEGIN IMMEDIATE sous SQLite)
+        storage.lock(game)
+        # Relue sous verrou : le balayage des délais a pu la clore entre-temps
+        if game.status != 'ongoing':
+            db.session.rollback()
+            return jsonify({'error': 'La partie n\'est pas en cours'}), 400
         
         current_turn = Turn.query.filter_by(game_id=game.id).order_by(Turn.id.desc()).first()
         
@@ -354,9 +413,14 @@ def play_turn(game_id):
                 game.joker_used_p2 = True
             print("   🃏 Bouffon utilisé")
         
-        db.session.commit()
-        print("   💾 Carte sauvegardée")
+        # Lus avant le commit : les alimenter ensuite ne coûte aucune requête
+        user_id, previous_activity = current_user.id, game.last_activity_at
+        game.last_activity_at = datetime.utcnow()
+        player_ids = (game.player1_id, game.player2_id)
         
+        # Le tour complet est résolu dans la même transaction, sous le verrou
+        # pris plus haut : carte et résultat sont validés ensemble
+        final_winner_id = None
         if current_turn.player1_card and current_turn.player2_card:
             print(f"   ⚔️ Calcul: {current_turn.player1_card} vs {current_turn.player2_card}")
             joker_active = current_turn.joker_used_by is not None
@@ -374,27 +438,30 @@ def play_turn(game_id):
                 update_score(game, 2)
                 print(f"   🏆 Vainqueur: P2. Score: {game.score1}-{game.score2}")
             
+            joker_player = None
+            if current_turn.joker_used_by is not None:
+                joker_player = 1 if current_turn.joker_used_by == game.player1_id else 2
+            profiles.record_turn(
+                game.player1_id, game.player2_id,
+                current_turn.player1_card, current_turn.player2_card, winner, joker_player
+            )
+            
             final_winner_id = check_victory(game)
             if final_winner_id:
-                game.status = 'finished'
-                game.finished_at = datetime.utcnow()
-                print(f"   🎉 Fin de partie ! Vainqueur: {final_winner_id}")
-                
-                winner_user = User.query.get(final_winner_id)
-                if winner_user: 
-                    winner_user.wins += 1
-                
-                p1_user = User.query.get(game.player1_id)
-                p2_user = User.query.get(game.player2_id)
-                if p1_user: 
-                    p1_user.games_played += 1
-                if p2_user: 
-                    p2_user.games_played += 1
-            
-            db.session.commit()
-            print("   💾 Résultat sauvegardé\n")
+                _finish_game(game, final_winner_id)
+        else:
+            print(f"   ⏳ En attente de l'autre joueur")
+        
+        db.session.commit()
+        print("   💾 Coup sauvegardé\n")
+        
+        anomaly.monitor.record_move(user_id, card, since=previous_activity)
+        if final_winner_id:
+            scheduler.forget(game_id)
+            cache.fragments.invalidate('leaderboard')
+            anomaly.monitor.record_game(*player_ids, final_winner_id)
         else:
-            print(f"   ⏳ En attente de l'autre joueur\n")
+            scheduler.touch(game_id)
         
         return jsonify({'success': True, 'message': 'Carte jouée'})
     
@@ -405,25 +472,168 @@ def play_turn(game_id):
         return jsonify({'error': 'Erreur serveur: ' + str(e)}), 500
 
 
+def _finish_game(game, final_winner_id):
+    """Clôt une partie gagnée : statistiques, Elo, face à face et tournoi (sans commit)"""
+    from app import profiles, rating, tournament
+    game.status = 'finished'
+    game.finished_at = datetime.utcnow()
+    print(f"   🎉 Fin de partie ! Vainqueur: {final_winner_id}")
+    
+    winner_user = User.query.get(final_winner_id)
+    if winner_user: 
+        winner_user.wins += 1
+    
+    p1_user = User.query.get(game.player1_id)
+    p2_user = User.query.get(game.player2_id)
+    if p1_user: 
+        p1_user.games_played += 1
+    if p2_user: 
+        p2_user.games_played += 1
+    if p1_user and p2_user:
+        loser_user = p2_user if final_winner_id == game.player1_id else p1_user
+        rating.apply_result(winner_user, loser_user)
+    
+    profiles.record_game(game.player1_id, game.player2_id, final_winner_id)
+    
+    if game.tournament_id:
+        tournament.record_results([(game.id, final_winner_id)])
+
+
+def _play_turn_event(game, player_num, card, use_joker):
+    """
+    Coup en mode EVENT_SOURCING : un INSERT dans le journal
+
+    La ligne games n'est écrite que par le coup qui termine la partie
+    (score, Bouffons, last_activity_at puis _finish_game) : les autres coups
+    ne se disputent aucune ligne. Les lectures en cours de partie rejouent
+    le journal, et le balayage des délais date la dernière activité par le
+    dernier événement.
+    """
+    from app import anomaly, events, profiles
+    game_id = game.id
+    # Verrou partagé : les coups ne s'attendent pas entre eux, mais un forfait
+    # prononcé par le balayage des délais est vu (ou attend la fin du coup)
+    storage.lock(game, shared=True)
+    if game.status != 'ongoing':
+        db.session.rollback()
+        return jsonify({'error': 'La partie n\'est pas en cours'}), 400
+    
+    state, error = events.play(
+        game_id, player_num, card, use_joker,
+        snapshot_interval=current_app.config['SNAPSHOT_INTERVAL']
+    )
+    if error:
+        db.session.rollback()
+        print(f"   ❌ {error}")
+        return jsonify({'error': error}), 400
+    
+    # Activité précédente : coup précédent du journal, sinon arrivée de l'adversaire
+    user_id, previous_activity = current_user.id, state.previous_at or game.last_activity_at
+    player_ids = (game.player1_id, game.player2_id)
+    
+    final_winner_id = None
+    if state.winner is not None:
+        print(f"   ⚔️ Tour {state.turn_number}: {state.card1} vs {state.card2}. Score: {state.score1}-{state.score2}")
+        joker_player = player_num if use_joker else (3 - player_num if state.joker else None)
+        profiles.record_turn(*player_ids, state.card1, state.card2, state.winner, joker_player)
+        if state.score1 >= 3 or state.score2 >= 3:
+            # Fin de partie : seule écriture sur la ligne games
+            events.project(game, state)
+            game.last_activity_at = datetime.utcnow()
+            final_winner_id = check_victory(game)
+            _finish_game(game, final_winner_id)
+    
+    db.session.commit()
+    print(f"   💾 Événement #{state.seq} enregistré\n")
+    
+    anomaly.monitor.record_move(user_id, card, since=previous_activity)
+    if final_winner_id:
+        scheduler.forget(game_id)
+        cache.fragments.invalidate('leaderboard')
+        anomaly.monitor.record_game(*player_ids, final_winner_id)
+    else:
+        scheduler.touch(game_id)
+    
+    return jsonify({'success': True, 'message': 'Carte jouée'})
+
+
 @bp.route('/leaderboard')
 def leaderboard():
     """Classement global"""
-    users = User.query.filter_by(is_guest=False).order_by(User.wins.desc(), User.games_played).limit(50).all()
-    return render_template('leaderboard.html', users=users)
+    def render_rows():
+        users = readmodels.users(
+            User.is_guest.is_(False),
+            order_by=(User.rating.desc(), User.wins.desc(), User.games_played), limit=50
+        )
+        return render_template('components/leaderboard_rows.html', users=users)
+    
+    rows, rendered_at = cache.fragments.get_or_render(
+        'leaderboard', render_rows, current_app.config['FRAGMENT_CACHE_TTL']
+    )
+    
+    response = make_response(render_template('leaderboard.html', rows=Markup(rows)))
+    response.last_modified = rendered_at
+    return response
+
+
+@bp.route('/tournaments')
+def tournaments():
+    """Liste des tournois"""
+    items = Tournament.query.order_by(Tournament.created_at.desc()).limit(50).all()
+    return render_template('tournaments.html', tournaments=items)
+
+
+@bp.route('/tournament/<int:tournament_id>')
+def tournament_detail(tournament_id):
+    """Classement et parties de la ronde courante d'un tournoi"""
+    from app import tournament
+    item = Tournament.query.get_or_404(tournament_id)
+    standings = tournament.standings(item.id)
+    games = readmodels.games(
+        Game.tournament_id == item.id, Game.tournament_round == item.current_round,
+        order_by=(Game.tournament_slot, Game.id),
+        key=lambda row: (row.tournament_slot or 0, row.id)
+    )
+    
+    return render_template('tournament.html', tournament=item, standings=standings, games=games)
 
 
 @bp.route('/history')
 @login_required
 def history():
     """Historique des parties du joueur"""
-    games = Game.query.filter(
-        ((Game.player1_id == current_user.id) | (Game.player2_id == current_user.id)) &
-        (Game.status == 'finished')
-    ).order_by(Game.finished_at.desc()).all()
+    games = readmodels.games(
+        (Game.player1_id == current_user.id) | (Game.player2_id == current_user.id),
+        Game.status == 'finished',
+        order_by=(Game.finished_at.desc(),),
+        key=lambda row: row.finished_at or datetime.min, reverse=True
+    )
     
     return render_template('history.html', games=games)
 
 
+@bp.route('/profile')
+@login_required
+def my_profile():
+    """Profil du joueur connecté"""
+    return redirect(url_for('main.profile', user_id=current_user.id))
+
+
+@bp.route('/profile/<int:user_id>')
+def profile(user_id):
+    """Profil d'un joueur : compteurs précalculés, sans parcours des tours"""
+    users = readmodels.users(User.id == user_id)
+    if not users:
+        abort(404)
+    
+    return render_template(
+        'profile.html',
+        player=users[0],
+        stats=readmodels.profile(user_id),
+        opponents=readmodels.head_to_head(user_id)
+    )
+
+
 @bp.route('/convert-guest', methods=['POST'])
 @login_required
 def convert_guest():
@@ -446,6 +656,7 @@ def convert_guest():
     current_user.is_guest = False
     
     db.session.commit()
+    cache.fragments.invalidate('leaderboard')
     
     flash('Votre compte a été créé avec succès !', 'success')
     return jsonify({'success': True, 'message': 'Compte créé'})
@@ -455,15 +666,20 @@ def convert_guest():
 @admin_required
 def admin_dashboard():
     """Tableau de bord administrateur"""
+    from app import sharding
     total_users = User.query.count()
     real_users = User.query.filter_by(is_guest=False).count()
-    total_games = Game.query.filter_by(status='finished').count()
-    active_games = Game.query.filter_by(status='ongoing').count()
+    total_games = sharding.count(db.select(db.func.count(Game.id)).filter_by(status='finished'))
+    active_games = sharding.count(db.select(db.func.count(Game.id)).filter_by(status='ongoing'))
     guests = User.query.filter_by(is_guest=True).count()
     admins = User.query.filter_by(is_admin=True).count()
     
-    recent_users = User.query.order_by(User.created_at.desc()).limit(10).all()
-    recent_games = Game.query.filter_by(status='finished').order_by(Game.finished_at.desc()).limit(10).all()
+    recent_users = readmodels.users(order_by=(User.created_at.desc(),), limit=10)
+    recent_games = readmodels.games(
+        Game.status == 'finished',
+        order_by=(Game.finished_at.desc(),),
+        key=lambda row: row.finished_at or datetime.min, reverse=True, limit=10
+    )
     
     return render_template('admin/dashboard.html',
                          total_users=total_users,
@@ -481,7 +697,7 @@ def admin_dashboard():
 @admin_required
 def admin_users():
     """Liste de tous les utilisateurs"""
-    users = User.query.order_by(User.created_at.desc()).all()
+    users = readmodels.users(order_by=(User.created_at.desc(),))
     return render_template('admin/users.html', users=users)
 
 
@@ -490,10 +706,32 @@ def admin_users():
 @admin_required
 def admin_games():
     """Liste de toutes les parties"""
-    games = Game.query.order_by(Game.created_at.desc()).limit(100).all()
+    games = readmodels.games(
+        order_by=(Game.created_at.desc(),),
+        key=lambda row: row.created_at or datetime.min, reverse=True, limit=100
+    )
     return render_template('admin/games.html', games=games)
 
 
+@bp.route('/admin/anomalies')
+@login_required
+@admin_required
+def admin_anomalies():
+    """Joueurs au comportement suspect (jeu automatisé, collusion)"""
+    from app import anomaly
+    report = anomaly.monitor.report()
+    
+    user_ids = {row['user_id'] for row in report} | {row['opponent_id'] for row in report if row['opponent_id']}
+    names = {user.id: user.username for user in readmodels.users(User.id.in_(user_ids))} if user_ids else {}
+    
+    return render_template('admin/anomalies.html',
+                         report=report,
+                         names=names,
+                         tracked=len(anomaly.monitor),
+                         min_moves=anomaly.MIN_MOVES,
+                         min_games=anomaly.MIN_GAMES)
+
+
 @bp.route('/admin/user/<int:user_id>/toggle-admin', methods=['POST'])
 @login_required
 @admin_required
@@ -518,6 +756,7 @@ def toggle_admin(user_id):
 @admin_required
 def delete_user(user_id):
     """Supprimer un utilisateur"""
+    from app import anomaly, bulk
     user = User.query.get_or_404(user_id)
     
     if user.id == current_user.id:
@@ -525,10 +764,11 @@ def delete_user(user_id):
         return redirect(url_for('main.admin_users'))
     
     username = user.username
-    db.session.delete(user)
-    db.session.commit()
+    _, deleted_games = bulk.delete_users([user.id])
+    cache.fragments.invalidate('leaderboard')
+    anomaly.monitor.forget(user_id)
     
-    flash(f'Utilisateur {username} supprimé', 'success')
+    flash(f'Utilisateur {username} supprimé ({deleted_games} partie(s))', 'success')
     return redirect(url_for('main.admin_users'))
 
 
@@ -537,10 +777,119 @@ def delete_user(user_id):
 @admin_required
 def delete_game(game_id):
     """Supprimer une partie"""
-    game = Game.query.get_or_404(game_id)
+    from app import bulk
+    Game.query.get_or_404(game_id)
     
-    db.session.delete(game)
-    db.session.commit()
+    bulk.delete_games([game_id])
     
     flash(f'Partie #{game_id} supprimée', 'success')
     return redirect(url_for('main.admin_games'))
+
+
+def _log_progress(label):
+    """Retourne un callback de progression qui écrit dans la console"""
+    def progress(done, total):
+        print(f"   🗑️ {label}: {done}/{total}")
+    return progress
+
+
+@bp.route('/admin/users/bulk-delete', methods=['POST'])
+@login_required
+@admin_required
+def bulk_delete_users():
+    """Supprimer plusieurs utilisateurs sélectionnés"""
+    from app import anomaly, bulk
+    user_ids = [uid for uid in request.form.getlist('user_ids', type=int) if uid != current_user.id]
+    
+    if not user_ids:
+        flash('Aucun utilisateur sélectionné', 'warning')
+        return redirect(url_for('main.admin_users'))
+    
+    deleted_users, deleted_games = bulk.delete_users(user_ids, progress=_log_progress('Utilisateurs'))
+    cache.fragments.invalidate('leaderboard')
+    for user_id in user_ids:
+        anomaly.monitor.forget(user_id)
+    
+    flash(f'{deleted_users} utilisateur(s) et {deleted_games} partie(s) supprimés', 'success')
+    return redirect(url_for('main.admin_users'))
+
+
+@bp.route('/admin/games/bulk-delete', methods=['POST'])
+@login_required
+@admin_required
+def bulk_delete_games():
+    """Supprimer plusieurs parties sélectionnées"""
+    from app import bulk
+    game_ids = request.form.getlist('game_ids', type=int)
+    
+    if not game_ids:
+        flash('Aucune partie sélectionnée', 'warning')
+        return redirect(url_for('main.admin_games'))
+    
+    deleted = bulk.delete_games(game_ids, progress=_log_progress('Parties'))
+    
+    flash(f'{deleted} partie(s) supprimée(s)', 'success')
+    return redirect(url_for('main.admin_games'))
+
+
+@bp.route('/admin/purge/guests', methods=['POST'])
+@login_required
+@admin_required
+def purge_guests():
+    """Supprimer tous les comptes invités et leurs parties"""
+    from app import bulk
+    deleted_users, deleted_games = bulk.purge_guests(
+        exclude_ids=[current_user.id],
+        progress=_log_progress('Invités')
+    )
+    
+    flash(f'{deleted_users} invité(s) et {deleted_games} partie(s) supprimés', 'success')
+    return redirect(url_for('main.admin_dashboard'))
+
+
+@bp.route('/admin/purge/waiting', methods=['POST'])
+@login_required
+@admin_required
+def purge_waiting_games():
+    """Supprimer toutes les parties en attente d'adversaire"""
+    from app import bulk
+    deleted = bulk.purge_waiting_games(progress=_log_progress('Parties en attente'))
+    
+    flash(f'{deleted} partie(s) en attente supprimée(s)', 'success')
+    return redirect(url_for('main.admin_dashboard'))
+
+
+@bp.route('/admin/tournaments', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def admin_tournaments():
+    """Création et liste des tournois"""
+    from app import tournament
+    if request.method == 'POST':
+        name = request.form.get('name', '').strip()
+        format = request.form.get('format')
+        
+        if request.form.get('all_players'):
+            user_ids = db.session.execute(
+                db.select(User.id).where(User.is_guest.is_(False))
+            ).scalars().all()
+        else:
+            user_ids = request.form.getlist('user_ids', type=int)
+        
+        if not name:
+            flash('Nom du tournoi requis', 'danger')
+            return redirect(url_for('main.admin_tournaments'))
+        
+        try:
+            item = tournament.create_tournament(name, format, user_ids)
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e), 'danger')
+            return redirect(url_for('main.admin_tournaments'))
+        
+        flash(f'Tournoi « {item.name} » lancé ({len(set(user_ids))} joueurs)', 'success')
+        return redirect(url_for('main.tournament_detail', tournament_id=item.id))
+    
+    items = Tournament.query.order_by(Tournament.created_at.desc()).all()
+    players = User.query.filter_by(is_guest=False).order_by(User.username).all()
+    return render_template('admin/tournaments.html', tournaments=items, players=players)
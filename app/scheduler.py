@@ -0,0 +1,347 @@
+"""
+Délais de tour et nettoyage des parties abandonnées
+Tas d'échéances traité par un thread d'arrière-plan, mises à jour groupées
+"""
+import heapq
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update, func, or_, and_, exists
+from app import db, sharding, storage
+from app.models import User, Game, Turn, GameEvent
+
+
+SWEEP_BATCH_SIZE = 500
+
+
+def _expired_condition(cutoff):
+    """Parties en cours sans activité depuis la date limite"""
+    condition = and_(
+        Game.status == 'ongoing',
+        or_(
+            Game.last_activity_at < cutoff,
+            and_(Game.last_activity_at.is_(None), Game.created_at < cutoff)
+        )
+    )
+    if current_app.config.get('EVENT_SOURCING'):
+        # Les coups ne touchent pas la ligne games : le dernier est dans le journal
+        condition = and_(condition, ~exists().where(
+            GameEvent.game_id == Game.id, GameEvent.created_at >= cutoff
+        ))
+    return condition
+
+
+def _forfeit_winner(p1_card, p2_card):
+    """
+    Détermine le vainqueur par forfait d'un tour entamé
+
+    Returns:
+        int or None: 1 ou 2 si un seul joueur a joué, None sinon
+    """
+    if p1_card and not p2_card:
+        return 1
+    if p2_card and not p1_card:
+        return 2
+    return None
+
+
+def _last_cards(game_ids):
+    """
+    Cartes du dernier tour de chaque partie : {game_id: (carte P1, carte P2)}
+
+    En mode EVENT_SOURCING, le score rejoué est d'abord reporté sur la
+    ligne games, que les coups ne mettent pas à jour (sans commit).
+    """
+    if current_app.config.get('EVENT_SOURCING'):
+        from app import events
+        states = events.load_states(game_ids)
+        events.project_states(states)
+        return {game_id: (state.card1, state.card2) for game_id, state in states.items()}
+
+    last_turn_ids = select(func.max(Turn.id)).where(Turn.game_id.in_(game_ids)).group_by(Turn.game_id)
+    return {
+        game_id: (p1_card, p2_card)
+        for game_id, p1_card, p2_card in db.session.execute(
+            select(Turn.game_id, Turn.player1_card, Turn.player2_card).where(Turn.id.in_(last_turn_ids))
+        )
+    }
+
+
+def _sweep_batch(condition):
+    """
+    Clôt un lot de parties expirées dans une seule transaction
+
+    Un joueur qui a joué face à un adversaire absent gagne par forfait
+    (son score passe à 3) ; sinon la partie est marquée 'abandoned'.
+
+    Returns:
+        tuple: (parties traitées, liste de (game_id, winner_id) des forfaits)
+    """
+    rows = db.session.execute(storage.for_update(
+        select(Game.id, Game.player1_id, Game.player2_id)
+        .where(condition)
+        .order_by(Game.id)
+        .limit(SWEEP_BATCH_SIZE)
+    )).all()
+
+    if not rows:
+        db.session.rollback()
+        return 0, []
+
+    game_ids = [row.id for row in rows]
+
+    last_cards = _last_cards(game_ids)
+
+    now = datetime.utcnow()
+    abandoned = []
+    won_by = {1: [], 2: []}
+    forfeits = []
+
+    for row in rows:
+        winner = _forfeit_winner(*last_cards.get(row.id, (None, None)))
+        if winner is None:
+            abandoned.append(row.id)
+        else:
+            won_by[winner].append(row.id)
+            forfeits.append((row, winner))
+
+    if abandoned:
+        db.session.execute(
+            update(Game).where(Game.id.in_(abandoned))
+            .values(status='abandoned', finished_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    if won_by[1]:
+        db.session.execute(
+            update(Game).where(Game.id.in_(won_by[1]))
+            .values(status='finished', score1=3, finished_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    if won_by[2]:
+        db.session.execute(
+            update(Game).where(Game.id.in_(won_by[2]))
+            .values(status='finished', score2=3, finished_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    results = []
+    if forfeits:
+        results = _record_forfeits(forfeits)
+
+    from app import tournament
+    tournament.record_results(results + [(game_id, None) for game_id in abandoned])
+
+    db.session.commit()
+    return len(rows), results
+
+
+def _record_forfeits(forfeits):
+    """
+    Met à jour victoires, parties jouées, classements Elo et face à face
+    des forfaits
+
+    Returns:
+        list: (game_id, winner_id) de chaque forfait
+    """
+    from app.rating import rating_delta, INITIAL_RATING
+
+    player_ids = {row.player1_id for row, _ in forfeits} | {row.player2_id for row, _ in forfeits}
+    ratings = {
+        user_id: (value if value is not None else INITIAL_RATING)
+        for user_id, value in db.session.execute(
+            select(User.id, User.rating).where(User.id.in_(player_ids))
+        )
+    }
+
+    wins = Counter()
+    played = Counter()
+    results = []
+    finished = []
+
+    for row, winner in forfeits:
+        winner_id, loser_id = (row.player1_id, row.player2_id) if winner == 1 else (row.player2_id, row.player1_id)
+        wins[winner_id] += 1
+        played[winner_id] += 1
+        played[loser_id] += 1
+        results.append((row.id, winner_id))
+        finished.append((row.player1_id, row.player2_id, winner_id))
+
+        if winner_id in ratings and loser_id in ratings:
+            delta = rating_delta(ratings[winner_id], ratings[loser_id])
+            ratings[winner_id] += delta
+            ratings[loser_id] -= delta
+
+    from app import profiles
+    profiles.record_games(finished)
+
+    new_ratings = [{'id': user_id, 'rating': ratings[user_id]} for user_id in played if user_id in ratings]
+    if new_ratings:
+        sharding.bulk_update(User, new_ratings)
+
+    # Un UPDATE par combinaison d'incréments (en pratique : gagnants / perdants)
+    increments = {}
+    for user_id, count in played.items():
+        increments.setdefault((count, wins[user_id]), []).append(user_id)
+    for (count, won), user_ids in increments.items():
+        db.session.execute(
+            update(User).where(User.id.in_(user_ids))
+            .values(games_played=User.games_played + count, wins=User.wins + won)
+            .execution_options(synchronize_session=False)
+        )
+
+    return results
+
+
+def sweep(timeout, game_ids=None):
+    """
+    Clôt toutes les parties en cours dont le délai de tour est dépassé
+
+    Args:
+        timeout (int): Délai de tour en secondes
+        game_ids (list): Restreint le balayage à ces parties (None = toutes)
+
+    Returns:
+        tuple: (parties clôturées, liste de (game_id, winner_id) des forfaits)
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    condition = _expired_condition(cutoff)
+    if game_ids is not None:
+        condition = and_(condition, Game.id.in_(list(game_ids)))
+
+    closed = 0
+    forfeits = []
+    while True:
+        count, results = _sweep_batch(condition)
+        if not count:
+            break
+        closed += count
+        forfeits.extend(results)
+
+    if forfeits:
+        from app import cache
+        cache.fragments.invalidate('leaderboard')
+
+    return closed, forfeits
+
+
+class DeadlineScheduler:
+    """
+    Échéances de tour tenues dans un tas (deadline, game_id)
+
+    Chaque coup repousse l'échéance de la partie ; les entrées périmées
+    sont ignorées au dépilage. Le tas est local au processus : un balayage
+    complet périodique (requête indexée) rattrape les parties jouées sur
+    d'autres workers, et la base reste l'arbitre final (last_activity_at).
+    """
+
+    def __init__(self):
+        self.app = None
+        self.timeout = None
+        self.sweep_interval = None
+        self._heap = []
+        self._deadlines = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def touch(self, game_id):
+        """Repousse l'échéance d'une partie après un coup"""
+        if not self.running:
+            return
+        deadline = time.time() + self.timeout
+        with self._lock:
+            self._deadlines[game_id] = deadline
+            heapq.heappush(self._heap, (deadline, game_id))
+            earliest = self._heap[0][1] == game_id
+        if earliest:
+            self._wake.set()
+
+    def forget(self, game_id):
+        """Retire une partie terminée du suivi"""
+        with self._lock:
+            self._deadlines.pop(game_id, None)
+
+    def start(self, app):
+        """Charge les parties en cours et démarre le thread d'arrière-plan"""
+        if self.running:
+            return
+        self.app = app
+        self.timeout = app.config['TURN_TIMEOUT']
+        self.sweep_interval = app.config['SWEEP_INTERVAL']
+
+        with app.app_context():
+            rows = db.session.execute(
+                select(Game.id, func.coalesce(Game.last_activity_at, Game.created_at))
+                .where(Game.status == 'ongoing')
+            ).all()
+            db.session.remove()
+
+        with self._lock:
+            for game_id, last_activity in rows:
+                deadline = (last_activity - datetime.utcnow()).total_seconds() + time.time() + self.timeout
+                self._deadlines[game_id] = deadline
+                self._heap.append((deadline, game_id))
+            heapq.heapify(self._heap)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='deadline-scheduler', daemon=True)
+        self._thread.start()
+        print(f"⏰ Planificateur de délais démarré ({len(rows)} partie(s) suivie(s))")
+
+    def stop(self):
+        """Arrête le thread d'arrière-plan"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _pop_due(self, now):
+        """Dépile les parties dont l'échéance est passée"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, game_id = heapq.heappop(self._heap)
+                if self._deadlines.get(game_id) == deadline:
+                    del self._deadlines[game_id]
+                    due.append(game_id)
+            next_at = self._heap[0][0] if self._heap else now + self.sweep_interval
+        return due, next_at
+
+    def _run(self):
+        last_full_sweep = time.time()
+
+        while not self._stop.is_set():
+            now = time.time()
+            due, next_at = self._pop_due(now)
+            full = now - last_full_sweep >= self.sweep_interval
+
+            if due or full:
+                with self.app.app_context():
+                    try:
+                        closed, forfeits = sweep(self.timeout, game_ids=None if full else due)
+                        if closed:
+                            print(f"⏰ {closed} partie(s) clôturée(s), dont {len(forfeits)} par forfait")
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"❌ Erreur du planificateur: {e}")
+                        traceback.print_exc()
+                    finally:
+                        db.session.remove()
+                if full:
+                    last_full_sweep = now
+
+            wait = min(next_at, last_full_sweep + self.sweep_interval) - time.time()
+            self._wake.wait(max(wait, 0.05))
+            self._wake.clear()
+
+
+scheduler = DeadlineScheduler()
@@ -0,0 +1,71 @@
+"""
+Création et mise à jour du schéma de base de données
+Étape explicite (python manage.py init-db), jamais exécutée au démarrage
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from app import db
+
+
+def upgrade(echo=print):
+    """
+    Crée les tables manquantes puis ajoute colonnes et index manquants,
+    sur la base globale puis sur chaque shard de parties
+
+    Les colonnes ajoutées après coup doivent être nullables ou avoir un
+    server_default pour pouvoir être ajoutées à une table existante.
+
+    Args:
+        echo (callable): Fonction d'affichage de la progression
+
+    Returns:
+        int: Nombre de modifications appliquées
+    """
+    from app import models, sharding  # noqa: F401  (enregistre les tables dans la metadata)
+
+    changes = _upgrade_engine(db.engine, db.metadata, echo, '')
+
+    if sharding.enabled():
+        metadata = sharding.shard_metadata()
+        for shard in sharding.shard_ids():
+            changes += _upgrade_engine(db.engines[shard], metadata, echo, f'[{shard}] ')
+
+    return changes
+
+
+def _upgrade_engine(engine, metadata, echo, prefix):
+    """Applique la mise à jour d'une metadata sur une base, retourne le nombre de modifications"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    changes = 0
+
+    missing_tables = [t for t in metadata.sorted_tables if t.name not in existing_tables]
+    if missing_tables:
+        metadata.create_all(engine, tables=missing_tables)
+        for table in missing_tables:
+            echo(f"   + {prefix}table {table.name}")
+        changes += len(missing_tables)
+
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            columns = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                echo(f"   + {prefix}colonne {table.name}.{column.name}")
+                changes += 1
+
+            indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                index.create(conn)
+                echo(f"   + {prefix}index {index.name}")
+                changes += 1
+
+    return changes
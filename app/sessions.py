@@ -0,0 +1,262 @@
+"""
+Sessions côté serveur (SESSION_BACKEND = 'memory' ou 'file')
+Le cookie ne porte qu'un identifiant compact ; les données restent en
+mémoire (LRU) ou dans un fichier clé-valeur local (SQLite)
+"""
+import itertools
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+BACKENDS = ('cookie', 'memory', 'file')
+
+SID_BYTES = 16  # 128 bits, 22 caractères dans le cookie
+TOUCH_INTERVAL = 60  # Expiration prolongée au plus une fois par minute et par session
+SWEEP_INTERVAL = 60  # Purge des sessions expirées (secondes entre deux lots)
+SWEEP_BATCH = 1000  # Sessions supprimées par lot
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    Session dont seules les données modifiées sont réécrites
+
+    Un clear() (connexion, déconnexion) fait changer l'identifiant au
+    prochain enregistrement : pas de fixation de session.
+    """
+
+    def __init__(self, initial=None, sid=None, expires=None):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires = expires
+        self.modified = False
+        self.accessed = False
+        self.rotate = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+    @property
+    def new(self):
+        return self.sid is None
+
+    def clear(self):
+        super().clear()
+        self.rotate = True
+
+
+class MemoryStore:
+    """
+    Sessions en mémoire du processus (un seul worker)
+
+    Ordre d'accès tenu par l'OrderedDict : les plus anciennes sont en tête,
+    évincées au-delà de max_entries et purgées en premier.
+    """
+
+    def __init__(self, max_entries):
+        self._items = OrderedDict()  # sid -> (données, expiration)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, sid):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is not None:
+                self._items.move_to_end(sid)
+            return item
+
+    def set(self, sid, data, expires):
+        with self._lock:
+            self._items[sid] = (data, expires)
+            self._items.move_to_end(sid)
+            while len(self._items) > self._max_entries:
+                self._items.popitem(last=False)
+
+    def touch(self, sid, expires):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is not None:
+                self._items[sid] = (item[0], expires)
+
+    def delete(self, sid):
+        with self._lock:
+            self._items.pop(sid, None)
+
+    def sweep(self, now, batch=SWEEP_BATCH):
+        """Supprime les sessions expirées en tête de file, au plus `batch`"""
+        with self._lock:
+            expired = [
+                sid for sid, (_, expires) in itertools.islice(self._items.items(), batch)
+                if expires <= now
+            ]
+            for sid in expired:
+                del self._items[sid]
+        return len(expired)
+
+
+class FileStore:
+    """
+    Sessions dans un fichier SQLite local (WAL), partagé par les workers
+    d'un même serveur ; une connexion par thread
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)")
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get(self, sid):
+        return self._connection().execute(
+            "SELECT data, expires FROM sessions WHERE sid = ?", (sid,)
+        ).fetchone()
+
+    def set(self, sid, data, expires):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)", (sid, data, expires)
+        )
+
+    def touch(self, sid, expires):
+        self._connection().execute("UPDATE sessions SET expires = ? WHERE sid = ?", (expires, sid))
+
+    def delete(self, sid):
+        self._connection().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def sweep(self, now, batch=SWEEP_BATCH):
+        """Supprime au plus `batch` sessions expirées (par l'index sur expires)"""
+        return self._connection().execute(
+            "DELETE FROM sessions WHERE sid IN "
+            "(SELECT sid FROM sessions WHERE expires <= ? LIMIT ?)", (now, batch)
+        ).rowcount
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Sessions côté serveur à expiration glissante
+
+    Chaque accès repousse l'expiration à PERMANENT_SESSION_LIFETIME, mais
+    l'écriture n'a lieu que si les données ont changé ou si la dernière
+    prolongation date de plus de TOUCH_INTERVAL : un client qui interroge
+    game_state en boucle ne réécrit rien. Le cookie n'est envoyé qu'à la
+    création (ou à la prolongation d'une session permanente).
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+        self._swept_at = time.monotonic()
+
+    def open_session(self, app, request):
+        self._maybe_sweep()
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            item = self.store.get(sid)
+            if item is not None and item[1] > time.time():
+                data, expires = item
+                return ServerSession(self.serializer.loads(data), sid=sid, expires=expires)
+        return ServerSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.sid is not None and session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        lifetime = app.permanent_session_lifetime.total_seconds()
+
+        if session.rotate and session.sid is not None:
+            self.store.delete(session.sid)
+            session.sid = None
+
+        send_cookie = session.new
+        if session.new:
+            session.sid = secrets.token_urlsafe(SID_BYTES)
+            self.store.set(session.sid, self.serializer.dumps(dict(session)), now + lifetime)
+        elif session.modified:
+            self.store.set(session.sid, self.serializer.dumps(dict(session)), now + lifetime)
+            send_cookie = session.permanent
+        elif session.expires < now + lifetime - TOUCH_INTERVAL:
+            self.store.touch(session.sid, now + lifetime)
+            send_cookie = session.permanent
+        else:
+            return
+
+        if send_cookie:
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+    def _maybe_sweep(self):
+        """Un lot de purge au plus toutes les SWEEP_INTERVAL secondes"""
+        if time.monotonic() - self._swept_at < SWEEP_INTERVAL:
+            return
+        self._swept_at = time.monotonic()
+        self.store.sweep(time.time())
+
+
+def init_app(app):
+    """Remplace la session signée par cookie selon SESSION_BACKEND"""
+    backend = app.config.get('SESSION_BACKEND', 'cookie')
+    if backend not in BACKENDS:
+        raise ValueError(f"Stockage de session inconnu: {backend}")
+
+    if backend == 'memory':
+        store = MemoryStore(app.config.get('SESSION_MAX_ENTRIES', 100000))
+    elif backend == 'file':
+        store = FileStore(app.config['SESSION_FILE'])
+    else:
+        return
+    app.session_interface = ServerSessionInterface(store)
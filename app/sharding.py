@@ -0,0 +1,416 @@
+"""
+Partitionnement horizontal des parties par game_id
+games, turns, game_events et game_snapshots répartis sur GAME_SHARDS bases ;
+utilisateurs et tournois restent sur la base globale
+"""
+import heapq
+import itertools
+from flask import current_app
+from flask.globals import app_ctx
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, bindparam, insert, update, select, func, MetaData
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BooleanClauseList, BindParameter
+from app import db
+
+
+GLOBAL = 'global'
+SHARDED_TABLES = ('games', 'turns', 'game_events', 'game_snapshots')
+
+
+def shard_count():
+    """Nombre de shards de parties (0 : base unique)"""
+    return current_app.config.get('GAME_SHARDS') or 0
+
+
+def enabled():
+    return shard_count() > 0
+
+
+def _shard_name(k):
+    return f'shard{k}'
+
+
+def shard_for(game_id):
+    """
+    Shard d'une partie
+
+    Les IDs du shard k valent k+1, k+1+N, k+1+2N... : l'ID suffit à router.
+    """
+    return _shard_name((game_id - 1) % shard_count())
+
+
+def shard_ids():
+    """
+    Identifiants des shards de parties : les noms de leurs binds
+
+    Jamais 0 : SQLAlchemy teste le jeton d'identité par sa valeur de
+    vérité, et rechargerait un objet du shard 0 depuis tous les shards.
+    """
+    return [_shard_name(k) for k in range(shard_count())]
+
+
+def all_shard_ids():
+    """Base globale puis shards ([None] sans partitionnement)"""
+    if not enabled():
+        return [None]
+    return [GLOBAL] + shard_ids()
+
+
+def configure(app):
+    """
+    Déclare un bind SQLAlchemy par shard (avant db.init_app)
+
+    GAME_SHARD_URIS liste les bases ; à défaut, sous SQLite, chaque shard
+    est un fichier voisin de la base globale (ou une base en mémoire).
+    """
+    count = app.config.get('GAME_SHARDS') or 0
+    if not count:
+        return
+
+    uris = list(app.config.get('GAME_SHARD_URIS') or [])
+    if not uris:
+        uris = [_derived_uri(app.config['SQLALCHEMY_DATABASE_URI'], k) for k in range(count)]
+    if len(uris) != count:
+        raise ValueError(f"GAME_SHARD_URIS doit lister {count} base(s), {len(uris)} fournie(s)")
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for k, uri in enumerate(uris):
+        binds.setdefault(_shard_name(k), uri)
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def _derived_uri(uri, k):
+    """URI du shard k déduite d'une URI SQLite"""
+    if uri == 'sqlite://':
+        return uri
+    if uri.startswith('sqlite:///'):
+        root, dot, ext = uri.rpartition('.')
+        return f"{root}.shard{k}.{ext}" if dot and '/' not in ext else f"{uri}.shard{k}"
+    raise ValueError("GAME_SHARD_URIS est requis hors SQLite")
+
+
+def init_app(app):
+    """
+    Installe la session routée (après db.init_app)
+
+    db.session est partagé par toutes les applications du processus : la
+    classe de session est choisie à chaque ouverture, selon l'application
+    courante. Une application sans GAME_SHARDS garde la session Flask
+    ordinaire, même après la création d'une application partitionnée.
+    """
+    if not isinstance(db.session.session_factory, _SessionFactory):
+        db.session = scoped_session(_SessionFactory(db), scopefunc=lambda: id(app_ctx._get_current_object()))
+
+    count = app.config.get('GAME_SHARDS') or 0
+    if not count:
+        return
+
+    with app.app_context():
+        engines = [db.engines[_shard_name(k)] for k in range(count)]
+
+    # MySQL : auto-incrément entrelacé, les IDs du shard k valent k+1 modulo N
+    for k, engine in enumerate(engines):
+        if engine.dialect.name == 'mysql':
+            event.listen(engine, 'connect', _auto_increment_setter(count, k + 1))
+
+    app.extensions['sharding'] = {'next_shard': itertools.count()}
+
+
+class _SessionFactory:
+    """Fabrique de db.session : RoutingSession si l'application courante est partitionnée"""
+
+    def __init__(self, db):
+        self.plain = sessionmaker(class_=FlaskSession, db=db, query_cls=db.Query)
+        self.routed = sessionmaker(class_=RoutingSession, db=db, query_cls=db.Query)
+
+    def __call__(self, **kwargs):
+        factory = self.routed if 'sharding' in current_app.extensions else self.plain
+        return factory(**kwargs)
+
+
+def _auto_increment_setter(increment, offset):
+    def set_auto_increment(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET SESSION auto_increment_increment = {increment}, auto_increment_offset = {offset}")
+        cursor.close()
+    return set_auto_increment
+
+
+class RoutingSession(ShardedSession, FlaskSession):
+    """Session Flask-SQLAlchemy routant chaque requête vers la base globale ou un shard"""
+
+    def __init__(self, db, **kwargs):
+        shards = {GLOBAL: db.engine}
+        shards.update({shard: db.engines[shard] for shard in shard_ids()})
+        super().__init__(
+            shard_chooser=_shard_chooser,
+            identity_chooser=_identity_chooser,
+            execute_chooser=_execute_chooser,
+            shards=shards,
+            db=db,
+            **kwargs
+        )
+
+
+def _sharded(mapper):
+    return mapper is not None and mapper.local_table.name in SHARDED_TABLES
+
+
+def _routing_key(mapper):
+    return 'id' if mapper.local_table.name == 'games' else 'game_id'
+
+
+def _shard_chooser(mapper, instance, clause=None):
+    """Shard d'un objet à écrire ; une nouvelle partie est placée à tour de rôle"""
+    if not _sharded(mapper):
+        return GLOBAL
+    if instance is None:
+        raise ValueError(f"Shard indéterminé pour {mapper.class_.__name__} : préciser shard_id")
+
+    game_id = getattr(instance, _routing_key(mapper))
+    if game_id is not None:
+        return shard_for(game_id)
+
+    shard = next_shard()
+    instance.id = _preassigned_ids(shard, 1)[0]
+    return shard
+
+
+def _identity_chooser(mapper, primary_key, *, lazy_loaded_from, execution_options, bind_arguments, **kw):
+    """Shards où chercher un objet par clé primaire"""
+    if not _sharded(mapper):
+        return [GLOBAL]
+    if mapper.local_table.name == 'games':
+        return [shard_for(primary_key[0])]
+    return shard_ids()
+
+
+def _execute_chooser(orm_context):
+    """Shards concernés par une requête : ceux des game_id cités, sinon tous"""
+    mapper = orm_context.bind_mapper
+    if not _sharded(mapper):
+        return [GLOBAL]
+
+    if orm_context.is_insert:
+        rows = orm_context.parameters or orm_context.statement.compile().params
+        if isinstance(rows, dict):
+            rows = [rows]
+        game_ids = {row.get(_routing_key(mapper)) for row in rows}
+        if None in game_ids or len({shard_for(game_id) for game_id in game_ids}) > 1:
+            raise ValueError("INSERT multi-shard : utiliser sharding.insert_games")
+    else:
+        game_ids = _criteria_game_ids(orm_context.statement.whereclause)
+
+    if game_ids is None:
+        return shard_ids()
+    return sorted({shard_for(game_id) for game_id in game_ids}) or shard_ids()[:1]
+
+
+def _criteria_game_ids(clause):
+    """
+    IDs de parties imposés par une clause WHERE (conjonctions seulement)
+
+    Reconnaît games.id et <table partitionnée>.game_id comparés par = ou IN
+    à des valeurs littérales.
+
+    Returns:
+        set or None: IDs, None si la requête peut toucher toutes les parties
+    """
+    if clause is None:
+        return None
+
+    if isinstance(clause, BooleanClauseList):
+        if clause.operator is not operators.and_:
+            return None
+        for criterion in clause.clauses:
+            game_ids = _criteria_game_ids(criterion)
+            if game_ids is not None:
+                return game_ids
+        return None
+
+    if not isinstance(clause, BinaryExpression) or not isinstance(clause.right, BindParameter):
+        return None
+
+    column = clause.left
+    table = getattr(column, 'table', None)
+    if table is None or getattr(table, 'name', None) not in SHARDED_TABLES:
+        return None
+    if column.name != ('id' if table.name == 'games' else 'game_id'):
+        return None
+
+    value = clause.right.effective_value
+    if clause.operator is operators.eq and value is not None:
+        return {value}
+    if clause.operator is operators.in_op:
+        return set(value)
+    return None
+
+
+def next_shard():
+    """Shard de la prochaine partie créée (à tour de rôle)"""
+    return _shard_name(next(current_app.extensions['sharding']['next_shard']) % shard_count())
+
+
+def _preassigned_ids(shard, count):
+    """
+    IDs à fournir explicitement pour de nouvelles parties du shard
+
+    MySQL les attribue lui-même (auto-incrément entrelacé) : liste de None.
+    SQLite n'a pas d'incrément réglable : on part du plus grand ID du shard,
+    lu dans la transaction courante (sérialisée par BEGIN IMMEDIATE).
+    """
+    engine = db.engines[shard]
+    if engine.dialect.name != 'sqlite':
+        return [None] * count
+
+    from app.models import Game
+    connection = db.session().connection(bind_arguments={'shard_id': shard})
+    last = connection.execute(select(func.max(Game.id))).scalar()
+    step = shard_count()
+    first = last + step if last else shard_ids().index(shard) + 1
+    return [first + step * n for n in range(count)]
+
+
+def bulk_insert(model, rows, shard_id=GLOBAL):
+    """
+    INSERT en masse (executemany) sur une base
+
+    ShardedSession refuse les DML en masse de l'ORM (routage par objet) :
+    avec partitionnement, ils passent par le Core sur la connexion de la
+    base concernée, dans la même transaction.
+
+    Args:
+        model: Classe ORM
+        rows (list): Dicts de colonnes
+        shard_id: Base cible (globale par défaut)
+    """
+    if not enabled():
+        db.session.execute(insert(model), rows)
+        return
+    connection = db.session.connection(bind_arguments={'shard_id': shard_id})
+    connection.execute(insert(model.__table__), rows)
+
+
+def bulk_update(model, rows):
+    """
+    UPDATE en masse par clé primaire sur la base globale
+
+    Args:
+        model: Classe ORM (table globale)
+        rows (list): Dicts contenant 'id' et les colonnes à modifier
+    """
+    if not enabled():
+        db.session.execute(update(model), rows)
+        return
+    table = model.__table__
+    connection = db.session.connection(bind_arguments={'shard_id': GLOBAL})
+    connection.execute(
+        update(table).where(table.c.id == bindparam('_id')),
+        [{('_id' if name == 'id' else name): value for name, value in row.items()} for row in rows]
+    )
+
+
+def insert_games(rows):
+    """
+    Insère des parties en masse, réparties à tour de rôle entre les shards
+
+    Sous SQLite, les IDs sont déduits du plus grand ID de chaque shard :
+    l'insertion se fait sous verrou d'écriture (storage.begin_write), sans
+    quoi deux créations simultanées prendraient les mêmes IDs.
+
+    Args:
+        rows (list): Dicts de colonnes (sans 'id')
+    """
+    from app import storage
+    from app.models import Game
+    if not rows:
+        return
+    storage.begin_write()
+    if not enabled():
+        bulk_insert(Game, rows)
+        return
+
+    by_shard = {}
+    for row in rows:
+        by_shard.setdefault(next_shard(), []).append(row)
+
+    for shard, shard_rows in by_shard.items():
+        for row, game_id in zip(shard_rows, _preassigned_ids(shard, len(shard_rows))):
+            if game_id is not None:
+                row['id'] = game_id
+        bulk_insert(Game, shard_rows, shard)
+
+
+def count(statement):
+    """Exécute un SELECT COUNT(...) sur chaque shard concerné et additionne"""
+    return sum(value or 0 for value in db.session.execute(statement).scalars())
+
+
+def merge_sorted(statement, key, reverse=False, limit=None, scalars=True):
+    """
+    Résultats d'une requête triée, fusionnés entre les shards
+
+    Chaque shard applique déjà ORDER BY et LIMIT : il suffit de retrier
+    au plus N * limit lignes. Sans partitionnement, la base a déjà trié.
+
+    Args:
+        statement: SELECT avec son ORDER BY (et son LIMIT éventuel)
+        key (callable): Clé de tri, identique à l'ORDER BY
+        reverse (bool): Tri décroissant
+        limit (int): Nombre maximal de lignes
+        scalars (bool): Retourne les objets plutôt que les lignes
+
+    Returns:
+        list: Lignes ou objets triés
+    """
+    result = db.session.execute(statement)
+    items = result.scalars().all() if scalars else result.all()
+    if not enabled():
+        return items
+    return sorted(items, key=key, reverse=reverse)[:limit]
+
+
+def stream_sorted(statement, key, chunk_size):
+    """
+    Parcourt en streaming une requête triée, fusion k-voies entre les shards
+
+    Yields:
+        Row: Lignes dans l'ordre global
+    """
+    statement = statement.execution_options(yield_per=chunk_size)
+    if not enabled():
+        yield from db.session.execute(statement)
+        return
+
+    streams = [
+        db.session.execute(statement, bind_arguments={'shard_id': shard})
+        for shard in shard_ids()
+    ]
+    yield from heapq.merge(*streams, key=key)
+
+
+def each_shard():
+    """bind_arguments de chaque shard de parties, pour les parcours shard par shard"""
+    if not enabled():
+        return [{}]
+    return [{'shard_id': shard} for shard in shard_ids()]
+
+
+def shard_metadata():
+    """
+    Tables des shards, sans les clés étrangères vers la base globale
+    (users, tournaments), qui ne peuvent pas traverser les bases
+    """
+    metadata = MetaData()
+    for name in SHARDED_TABLES:
+        table = db.metadata.tables[name].to_metadata(metadata)
+        for constraint in list(table.foreign_key_constraints):
+            if constraint.elements[0].target_fullname.split('.')[0] not in SHARDED_TABLES:
+                table.constraints.discard(constraint)
+                for element in constraint.elements:
+                    table.foreign_keys.discard(element)
+                    element.parent.foreign_keys.discard(element)
+    return metadata
@@ -3,6 +3,23 @@ let currentPlayerNum = null;
 let isGuest = false;
 let pollingInterval = null;
 let lastGameState = null;
+let lastStateVersion = 0;
+let lastCompactState = null;
+
+// Noms compacts du protocole d'état (voir COMPACT_FIELDS dans app/protocol.py)
+const COMPACT_FIELDS = {
+    s: 'status',
+    a: 'score1',
+    b: 'score2',
+    j1: 'joker_used_p1',
+    j2: 'joker_used_p2',
+    n1: 'player1',
+    n2: 'player2',
+    i1: 'player1_id',
+    i2: 'player2_id',
+    w: 'waiting_for',
+    t: 'last_turn'
+};
 
 window.addEventListener('DOMContentLoaded', function() {
     const gameDataEl = document.getElementById('game-data');
@@ -110,14 +127,22 @@ async function playCard(card) {
 
 async function updateGameState() {
     try {
-        const response = await fetch('/api/game/' + currentGameId + '/state');
-        const gameState = await response.json();
+        const response = await fetch('/api/game/' + currentGameId + '/state?since=' + lastStateVersion, {
+            cache: 'no-store'
+        });
+        
+        if (response.status === 304) {
+            return;
+        }
         
         if (!response.ok) {
             console.error('Erreur lors de la récupération de l\'état');
             return;
         }
         
+        const payload = await response.json();
+        const gameState = applyStatePayload(payload);
+        
         console.log('📊 État du jeu:', gameState);
         console.log('   ⏳ waiting_for:', gameState.waiting_for);
         console.log('   🎮 currentPlayerNum:', currentPlayerNum);
@@ -139,6 +164,38 @@ async function updateGameState() {
     }
 }
 
+function applyStatePayload(payload) {
+    if (payload.full) {
+        lastCompactState = payload.full;
+    } else {
+        lastCompactState = Object.assign({}, lastCompactState, payload.d);
+    }
+    lastStateVersion = payload.v;
+    
+    return expandState(lastCompactState);
+}
+
+function expandState(compact) {
+    const gameState = {};
+    
+    Object.keys(COMPACT_FIELDS).forEach(function(key) {
+        gameState[COMPACT_FIELDS[key]] = compact[key] === undefined ? null : compact[key];
+    });
+    
+    const turn = gameState.last_turn;
+    if (turn) {
+        gameState.last_turn = {
+            turn_number: turn[0],
+            player1_card: turn[1],
+            player2_card: turn[2],
+            winner_id: turn[3],
+            joker_used: turn[4]
+        };
+    }
+    
+    return gameState;
+}
+
 function updateScoreboard(gameState) {
     const score1El = document.querySelector('#player1-score .score');
     const score2El = document.querySelector('#player2-score .score');
@@ -0,0 +1,200 @@
+"""
+Moteur de stockage : MySQL, SQLite embarqué (WAL) ou SQLite en mémoire
+Choix de l'URI, pragmas SQLite et verrouillage adapté au dialecte
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from app import db
+
+
+BACKENDS = ('mysql', 'sqlite', 'memory')
+
+# Pragmas appliqués à chaque connexion SQLite (surchargeables via SQLITE_PRAGMAS)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Lecteurs jamais bloqués par l'écrivain
+    'synchronous': 'NORMAL',  # Sûr en WAL, un fsync par checkpoint seulement
+    'foreign_keys': 'ON',  # Mêmes contraintes qu'InnoDB
+    'busy_timeout': 5000,  # Attente du verrou d'écriture (ms) au lieu d'une erreur
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,  # ~20 Mo de cache de pages
+    'mmap_size': 268435456,
+}
+
+
+def configure(app):
+    """
+    Complète la configuration SQLAlchemy selon STORAGE_BACKEND
+
+    À appeler avant db.init_app. 'mysql' garde SQLALCHEMY_DATABASE_URI tel
+    quel ; 'sqlite' pointe sur SQLITE_PATH ; 'memory' partage une unique
+    connexion en mémoire entre les threads et crée le schéma au démarrage.
+    """
+    backend = app.config.get('STORAGE_BACKEND', 'mysql')
+    if backend not in BACKENDS:
+        raise ValueError(f"Moteur de stockage inconnu: {backend}")
+
+    if backend == 'sqlite':
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{app.config['SQLITE_PATH']}"
+    elif backend == 'memory':
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        app.config['AUTO_CREATE_SCHEMA'] = True
+
+    if app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://':
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('poolclass', StaticPool)
+        options.setdefault('connect_args', {'check_same_thread': False})
+
+
+def init_app(app):
+    """Installe les hooks SQLite sur les moteurs (après db.init_app)"""
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    pragmas = dict(SQLITE_PRAGMAS, **app.config.get('SQLITE_PRAGMAS', {}))
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            _install_sqlite_hooks(engine, pragmas)
+
+    # La session note si sa transaction a déjà écrit (voir begin_write)
+    if not event.contains(Session, 'do_orm_execute', _track_orm_write):
+        event.listen(Session, 'do_orm_execute', _track_orm_write)
+        event.listen(Session, 'after_flush', _track_flush)
+        event.listen(Session, 'after_transaction_end', _reset_write)
+
+
+def _track_orm_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['writing'] = True
+
+
+def _track_flush(session, flush_context):
+    session.info['writing'] = True
+
+
+def _reset_write(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('writing', None)
+
+
+def _install_sqlite_hooks(engine, pragmas):
+    """Pragmas à la connexion, BEGIN explicite (DEFERRED ou IMMEDIATE)"""
+    shared = _shared_connection(engine)
+    pragmas = dict(pragmas)
+    if shared:
+        pragmas.pop('journal_mode', None)
+        pragmas.pop('mmap_size', None)
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+        if not shared:
+            # Transactions pilotées par SQLAlchemy (BEGIN émis ci-dessous), pas par pysqlite
+            dbapi_connection.isolation_level = None
+
+    if shared:
+        return
+
+    @event.listens_for(engine, 'begin')
+    def _on_begin(conn):
+        mode = conn.get_execution_options().get('sqlite_begin', 'DEFERRED')
+        conn.exec_driver_sql(f"BEGIN {mode}")
+
+
+def _shared_connection(engine):
+    """True pour SQLite en mémoire : une connexion unique, rien à verrouiller"""
+    return isinstance(engine.pool, StaticPool)
+
+
+def is_sqlite():
+    """True si la base courante est SQLite"""
+    return db.engine.dialect.name == 'sqlite'
+
+
+def begin_write():
+    """
+    Garantit que la transaction courante détient le verrou d'écriture
+
+    SQLite n'a pas de verrou de ligne : une transaction qui lit puis écrit
+    échoue (SQLITE_BUSY) si un autre écrivain a validé entre-temps. On
+    démarre donc l'écriture par BEGIN IMMEDIATE, qui attend son tour
+    (busy_timeout), sur chaque base (globale puis shards, toujours dans cet
+    ordre). Une transaction qui n'a encore rien écrit est validée au
+    passage (les objets ORM sont rechargés à la demande). Sans effet sur
+    MySQL, où les verrous de ligne suffisent, ni en mémoire.
+    """
+    if not is_sqlite() or _shared_connection(db.engine):
+        return
+    session = db.session()
+    session.flush()
+    if session.info.get('writing'):
+        return
+    session.commit()
+
+    from app import sharding
+    for shard_id in sharding.all_shard_ids():
+        session.connection(
+            bind_arguments={'shard_id': shard_id},
+            execution_options={'sqlite_begin': 'IMMEDIATE'}
+        )
+    session.info['writing'] = True
+
+
+def for_update(statement):
+    """SELECT ... FOR UPDATE sur MySQL, verrou d'écriture global sur SQLite"""
+    if is_sqlite():
+        begin_write()
+        return statement
+    return statement.with_for_update()
+
+
+def lock(instance, shared=False):
+    """
+    Recharge un objet ORM en le verrouillant jusqu'à la fin de la transaction
+
+    Args:
+        instance: Objet ORM
+        shared (bool): Verrou partagé (LOCK IN SHARE MODE sous MySQL) :
+            les lecteurs ne s'attendent pas entre eux, seul un écrivain
+            qui modifie la ligne les attend
+    """
+    if is_sqlite():
+        begin_write()
+        db.session.refresh(instance)
+    else:
+        db.session.refresh(instance, with_for_update={'read': True} if shared else True)
+
+
+def add_counters(table, keys, rows):
+    """
+    Incrémente des compteurs, en créant les lignes absentes
+
+    Une seule instruction pour toutes les lignes : INSERT ... ON CONFLICT
+    DO UPDATE sous SQLite, ON DUPLICATE KEY UPDATE sous MySQL.
+
+    Args:
+        table: Table SQLAlchemy (base globale), de clé primaire `keys`
+        keys (tuple): Colonnes de la clé primaire
+        rows (list): Dicts clé + incréments, mêmes colonnes pour toutes les lignes
+    """
+    if not rows:
+        return
+    counters = [name for name in rows[0] if name not in keys]
+
+    if is_sqlite():
+        from sqlalchemy.dialects.sqlite import insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + statement.excluded[name] for name in counters}
+        )
+    else:
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table)
+        statement = statement.on_duplicate_key_update(
+            {name: table.c[name] + statement.inserted[name] for name in counters}
+        )
+    db.session.execute(statement, rows)
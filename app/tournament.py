@@ -0,0 +1,390 @@
+"""
+Moteur de tournois : système suisse et élimination directe
+Création des parties d'une ronde en un seul INSERT, classement incrémental
+"""
+import math
+from datetime import datetime
+from sqlalchemy import select, update, func
+from app import db, sharding, storage
+from app.models import User, Game, Tournament, TournamentEntry
+
+
+FORMATS = ('swiss', 'elimination')
+
+
+def total_rounds_for(player_count):
+    """Nombre de rondes nécessaires pour départager les joueurs"""
+    return max(1, math.ceil(math.log2(player_count)))
+
+
+def create_tournament(name, format, user_ids):
+    """
+    Crée un tournoi, inscrit les joueurs et lance la première ronde
+
+    Le tout tient dans une seule transaction.
+
+    Args:
+        name (str): Nom du tournoi
+        format (str): 'swiss' ou 'elimination'
+        user_ids (list): IDs des joueurs inscrits
+
+    Returns:
+        Tournament: Le tournoi créé
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Format de tournoi inconnu: {format}")
+
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) < 2:
+        raise ValueError("Un tournoi nécessite au moins 2 joueurs")
+
+    # Verrou d'écriture avant la première écriture : tournoi, inscriptions et
+    # parties de la première ronde restent dans la même transaction
+    storage.begin_write()
+
+    # Têtes de série : meilleur classement Elo d'abord
+    ratings = dict(db.session.execute(select(User.id, User.rating).where(User.id.in_(user_ids))).all())
+    user_ids = sorted((uid for uid in user_ids if uid in ratings), key=lambda uid: -(ratings[uid] or 0))
+
+    tournament = Tournament(
+        name=name,
+        format=format,
+        status='running',
+        current_round=0,
+        total_rounds=total_rounds_for(len(user_ids))
+    )
+    db.session.add(tournament)
+    db.session.flush()
+
+    sharding.bulk_insert(TournamentEntry, [
+        {'tournament_id': tournament.id, 'user_id': uid, 'seed': seed, 'points': 0, 'byes': 0, 'eliminated': False}
+        for seed, uid in enumerate(user_ids, start=1)
+    ])
+
+    _start_next_round(tournament)
+    db.session.commit()
+    return tournament
+
+
+def _create_round_games(tournament, round_number, pairs):
+    """
+    Insère toutes les parties d'une ronde en un seul INSERT multi-lignes (par shard)
+
+    Args:
+        pairs (list): (place dans la ronde, joueur 1, joueur 2)
+    """
+    if not pairs:
+        return
+    now = datetime.utcnow()
+    sharding.insert_games([
+        {
+            'player1_id': p1,
+            'player2_id': p2,
+            'status': 'ongoing',
+            'score1': 0,
+            'score2': 0,
+            'joker_used_p1': False,
+            'joker_used_p2': False,
+            'created_at': now,
+            'last_activity_at': now,
+            'tournament_id': tournament.id,
+            'tournament_round': round_number,
+            'tournament_slot': slot,
+        }
+        for slot, p1, p2 in pairs
+    ])
+
+
+def _award_byes(tournament, user_ids, points):
+    """Enregistre les exemptions (et leurs points éventuels)"""
+    if not user_ids:
+        return
+    db.session.execute(
+        update(TournamentEntry)
+        .where(TournamentEntry.tournament_id == tournament.id, TournamentEntry.user_id.in_(user_ids))
+        .values(byes=TournamentEntry.byes + 1, points=TournamentEntry.points + points)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _pair_swiss(tournament):
+    """
+    Appariement suisse : joueurs triés par points, voisins appariés en
+    évitant les revanches quand c'est possible
+
+    Returns:
+        tuple: (paires (place, joueur 1, joueur 2), IDs exemptés)
+    """
+    standings = db.session.execute(
+        select(TournamentEntry.user_id, TournamentEntry.byes)
+        .where(TournamentEntry.tournament_id == tournament.id)
+        .order_by(TournamentEntry.points.desc(), TournamentEntry.seed)
+    ).all()
+
+    played = set()
+    for p1, p2 in db.session.execute(
+        select(Game.player1_id, Game.player2_id).where(Game.tournament_id == tournament.id)
+    ):
+        played.add((p1, p2))
+        played.add((p2, p1))
+
+    players = [row.user_id for row in standings]
+    byes = []
+    if len(players) % 2:
+        # Exemption : le moins bien classé parmi ceux qui en ont eu le moins
+        fewest = min(row.byes for row in standings)
+        bye = next(row.user_id for row in reversed(standings) if row.byes == fewest)
+        players.remove(bye)
+        byes.append(bye)
+
+    pairs = []
+    while players:
+        p1 = players.pop(0)
+        opponent = next((p for p in players if (p1, p) not in played), players[0])
+        players.remove(opponent)
+        pairs.append((len(pairs), p1, opponent))
+
+    return pairs, byes
+
+
+def _bracket_order(size):
+    """
+    Têtes de série dans l'ordre d'un tableau de `size` places (puissance de 2)
+
+    Chaque paire de places voisines est une partie du premier tour : 1 contre
+    size, et les deux premières têtes de série ne se croisent qu'en finale.
+    """
+    order = [1]
+    while len(order) < size:
+        mirror = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, mirror - top)]
+    return order
+
+
+def _pair_elimination(tournament):
+    """
+    Appariement à élimination directe, dans l'ordre du tableau
+
+    Le tableau compte 2^k places : les 2^k - n places vides sont des
+    exemptions, toutes au premier tour et pour les meilleures têtes de
+    série (la tête de série 1 rencontre la dernière, ou est exemptée).
+    Ensuite, chaque joueur avance à la place de sa dernière partie (ou de
+    sa place initiale) divisée par deux : les vainqueurs de parties voisines
+    se rencontrent. Si des suppressions laissent des joueurs seuls, ils sont
+    appariés entre eux, et une éventuelle exemption va à un joueur qui n'en
+    a pas encore eu.
+
+    Returns:
+        tuple: (paires (place, joueur 1, joueur 2), IDs exemptés)
+    """
+    entries = db.session.execute(
+        select(TournamentEntry.user_id, TournamentEntry.seed, TournamentEntry.byes)
+        .where(TournamentEntry.tournament_id == tournament.id, TournamentEntry.eliminated.is_(False))
+        .order_by(TournamentEntry.seed)
+    ).all()
+    round_number = tournament.current_round + 1
+
+    order = _bracket_order(2 ** tournament.total_rounds)
+    initial = {seed: index // 2 for index, seed in enumerate(order)}
+
+    last_game = {}  # user_id -> (ronde, place) de sa dernière partie
+    for p1, p2, game_round, slot in db.session.execute(
+        select(Game.player1_id, Game.player2_id, Game.tournament_round, Game.tournament_slot)
+        .where(Game.tournament_id == tournament.id)
+    ):
+        for user_id in (p1, p2):
+            if game_round > last_game.get(user_id, (0, 0))[0]:
+                last_game[user_id] = (game_round, slot or 0)
+
+    places = {}
+    for entry in entries:
+        game_round, slot = last_game.get(entry.user_id, (1, initial.get(entry.seed, 0)))
+        places.setdefault(slot >> (round_number - game_round), []).append(entry)
+
+    pairs = []
+    alone = []
+    for place, group in sorted(places.items()):
+        if len(group) == 2:
+            pairs.append((place, group[0].user_id, group[1].user_id))
+        else:
+            alone.extend((place, entry) for entry in group)
+
+    if round_number == 1:
+        # Places vides du tableau : exemptions des meilleures têtes de série
+        return pairs, [entry.user_id for _, entry in alone]
+
+    byes = []
+    if len(alone) % 2:
+        _, bye = min(alone, key=lambda item: (item[1].byes, item[1].seed))
+        if bye.byes:
+            # Tous les joueurs seuls ont déjà été exemptés : on libère un joueur apparié
+            paired = {entry.user_id: entry for entry in entries}
+            fresh = [
+                (place, paired[uid]) for place, p1, p2 in pairs for uid in (p1, p2)
+                if not paired[uid].byes
+            ]
+            if fresh:
+                place, bye = min(fresh, key=lambda item: item[1].seed)
+                pair = next(pair for pair in pairs if pair[0] == place)
+                pairs.remove(pair)
+                partner = pair[1] if pair[2] == bye.user_id else pair[2]
+                alone = sorted(alone + [(place, paired[partner])], key=lambda item: item[0])
+        alone = [item for item in alone if item[1].user_id != bye.user_id]
+        byes.append(bye.user_id)
+
+    for index in range(0, len(alone), 2):
+        (place, first), (_, second) = alone[index], alone[index + 1]
+        pairs.append((place, first.user_id, second.user_id))
+
+    return sorted(pairs), byes
+
+
+def _finish(tournament):
+    """Clôt le tournoi et désigne le vainqueur"""
+    winner_id = db.session.execute(
+        select(TournamentEntry.user_id)
+        .where(TournamentEntry.tournament_id == tournament.id, TournamentEntry.eliminated.is_(False))
+        .order_by(TournamentEntry.points.desc(), TournamentEntry.seed)
+        .limit(1)
+    ).scalar()
+
+    tournament.status = 'finished'
+    tournament.finished_at = datetime.utcnow()
+    tournament.winner_id = winner_id
+    print(f"🏆 Tournoi #{tournament.id} terminé, vainqueur: {winner_id}")
+
+
+def _start_next_round(tournament):
+    """
+    Crée les parties de la ronde suivante ou termine le tournoi
+
+    Une ronde sans aucune partie (tous exemptés) enchaîne directement.
+    """
+    while True:
+        if tournament.format == 'elimination':
+            alive = db.session.execute(
+                select(func.count(TournamentEntry.id))
+                .where(TournamentEntry.tournament_id == tournament.id, TournamentEntry.eliminated.is_(False))
+            ).scalar()
+            if alive <= 1:
+                _finish(tournament)
+                return
+            pairs, byes = _pair_elimination(tournament)
+            bye_points = 0
+        else:
+            if tournament.current_round >= tournament.total_rounds:
+                _finish(tournament)
+                return
+            pairs, byes = _pair_swiss(tournament)
+            bye_points = 1
+
+        tournament.current_round += 1
+        tournament.pending_games = len(pairs)
+        _award_byes(tournament, byes, bye_points)
+        _create_round_games(tournament, tournament.current_round, pairs)
+        print(f"🏟️ Tournoi #{tournament.id} - ronde {tournament.current_round}: "
+              f"{len(pairs)} partie(s), {len(byes)} exempté(s)")
+
+        if pairs:
+            return
+
+
+def record_results(results):
+    """
+    Reporte des fins de parties dans les tournois concernés
+
+    Met à jour les points (et éliminations) puis passe à la ronde suivante
+    quand plus aucune partie de la ronde n'est en cours. Ne valide pas la
+    transaction : l'appelant commit avec la fin de partie.
+
+    Les parties restantes sont décomptées sur la ligne du tournoi, lue sous
+    verrou : deux dernières parties terminées en même temps se voient
+    l'une l'autre, ce que ne garantirait pas un COUNT sur les parties
+    (lecture d'instantané sous REPEATABLE READ).
+
+    Args:
+        results (list): (game_id, winner_id), winner_id None si abandon
+    """
+    if not results:
+        return
+
+    winners = dict(results)
+    games = db.session.execute(
+        select(Game.id, Game.tournament_id, Game.tournament_round, Game.player1_id, Game.player2_id)
+        .where(Game.id.in_(list(winners)), Game.tournament_id.isnot(None))
+    ).all()
+    if not games:
+        return
+
+    by_tournament = {}
+    for game in games:
+        by_tournament.setdefault(game.tournament_id, []).append(game)
+
+    for tournament_id, tournament_games in by_tournament.items():
+        # Verrou sur le tournoi : une seule requête fait avancer la ronde
+        tournament = db.session.execute(
+            storage.for_update(select(Tournament).where(Tournament.id == tournament_id))
+        ).scalar_one()
+        if tournament.status != 'running':
+            continue
+
+        round_winners = []
+        losers = []
+        for game in tournament_games:
+            winner_id = winners[game.id]
+            if winner_id is not None:
+                round_winners.append(winner_id)
+            losers.extend(uid for uid in (game.player1_id, game.player2_id) if uid != winner_id)
+
+        if round_winners:
+            db.session.execute(
+                update(TournamentEntry)
+                .where(TournamentEntry.tournament_id == tournament_id, TournamentEntry.user_id.in_(round_winners))
+                .values(points=TournamentEntry.points + 1)
+                .execution_options(synchronize_session=False)
+            )
+        if tournament.format == 'elimination' and losers:
+            db.session.execute(
+                update(TournamentEntry)
+                .where(TournamentEntry.tournament_id == tournament_id, TournamentEntry.user_id.in_(losers))
+                .values(eliminated=True)
+                .execution_options(synchronize_session=False)
+            )
+
+        if tournament.pending_games is None:
+            # Ronde lancée avant le décompte sur la ligne du tournoi
+            remaining = sharding.count(
+                select(func.count(Game.id))
+                .where(
+                    Game.tournament_id == tournament_id,
+                    Game.tournament_round == tournament.current_round,
+                    Game.status == 'ongoing',
+                    Game.id.notin_(list(winners))
+                )
+            )
+        else:
+            tournament.pending_games -= sum(
+                game.tournament_round == tournament.current_round for game in tournament_games
+            )
+            remaining = tournament.pending_games
+
+        if remaining <= 0:
+            _start_next_round(tournament)
+
+
+def standings(tournament_id):
+    """
+    Classement courant d'un tournoi (lu directement depuis les points)
+
+    Returns:
+        list: Lignes (user_id, username, points, byes, eliminated, seed)
+    """
+    return db.session.execute(
+        select(
+            TournamentEntry.user_id, User.username, TournamentEntry.points,
+            TournamentEntry.byes, TournamentEntry.eliminated, TournamentEntry.seed
+        )
+        .join(User, User.id == TournamentEntry.user_id)
+        .where(TournamentEntry.tournament_id == tournament_id)
+        .order_by(TournamentEntry.eliminated, TournamentEntry.points.desc(), TournamentEntry.seed)
+    ).all()
@@ -151,7 +151,7 @@ def format_game_result(game):
     Formate le résultat d'une partie pour l'affichage
     
     Args:
-        game: Objet Game
+        game: Objet Game ou GameRow (voir app/readmodels.py)
     
     Returns:
         dict: Informations formatées sur la partie
@@ -1,8 +1,10 @@
 """
-Configuration de l'application Flask et MySQL
+Configuration de l'application Flask et de la base de données
 """
 import os
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     # Clé secrète pour les sessions Flask
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'votre-cle-secrete-ultra-securisee-123'
@@ -13,9 +15,44 @@ class Config:
     MYSQL_PASSWORD = os.environ.get('MYSQL_PASSWORD') or ''
     MYSQL_DB = os.environ.get('MYSQL_DB') or 'battle_of_roles'
     
+    # Stockage : 'mysql' (défaut), 'sqlite' (fichier local en WAL, un seul nœud)
+    # ou 'memory' (SQLite en mémoire, schéma créé au démarrage : tests, benchmarks)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND') or 'mysql'
+    SQLITE_PATH = os.environ.get('SQLITE_PATH') or os.path.join(basedir, 'battle_of_roles.db')
+    
+    # Partitionnement des parties par game_id (0 = base unique). Les utilisateurs
+    # et tournois restent sur la base principale ; GAME_SHARD_URIS liste les
+    # bases des shards (sous SQLite, des fichiers voisins par défaut)
+    GAME_SHARDS = int(os.environ.get('GAME_SHARDS') or 0)
+    GAME_SHARD_URIS = [uri for uri in (os.environ.get('GAME_SHARD_URIS') or '').split(',') if uri]
+    
     # SQLAlchemy
     SQLALCHEMY_DATABASE_URI = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Création automatique du schéma au démarrage (désactivée : voir manage.py init-db)
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA') == '1'
+    
     # Session configuration
-    PERMANENT_SESSION_LIFETIME = 3600  # 1 heure
\ No newline at end of file
+    PERMANENT_SESSION_LIFETIME = 3600  # 1 heure (expiration glissante des sessions côté serveur)
+    
+    # Stockage des sessions : 'cookie' (défaut, signé par Flask), 'memory' (LRU
+    # en mémoire, un seul worker) ou 'file' (fichier SQLite local, multi-workers)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND') or 'cookie'
+    SESSION_FILE = os.environ.get('SESSION_FILE') or os.path.join(basedir, 'sessions.db')
+    SESSION_MAX_ENTRIES = 100000
+    
+    # Cache HTTP
+    STATIC_MAX_AGE = 31536000  # 1 an pour les fichiers statiques versionnés (?v=)
+    PAGE_MAX_AGE = 60  # Pages publiques (visiteurs anonymes)
+    FRAGMENT_CACHE_TTL = 60  # Fragments rendus (classement)
+    
+    # Délais de tour
+    TURN_TIMEOUT = int(os.environ.get('TURN_TIMEOUT') or 120)  # Secondes sans coup avant forfait/abandon
+    SWEEP_INTERVAL = 60  # Balayage complet des parties expirées
+    DEADLINE_SCHEDULER = os.environ.get('DEADLINE_SCHEDULER', '1') == '1'  # Thread lancé par run.py
+    
+    # Journal d'événements : chaque coup est un INSERT dans game_events, l'état
+    # est rejoué depuis le dernier instantané (à basculer sans partie en cours)
+    EVENT_SOURCING = os.environ.get('EVENT_SOURCING') == '1'
+    SNAPSHOT_INTERVAL = 20  # Un instantané tous les N coups
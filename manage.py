@@ -3,11 +3,21 @@ Script de gestion pour Battle of Roles
 Commandes utiles pour gérer la base de données et l'application
 """
 import click
-from app import create_app, db
-from app.models import User, Game, Turn
-import secrets
+import os
+import statistics
+import subprocess
+import sys
 
-app = create_app()
+_app = None
+
+
+def get_app():
+    """Construit l'application à la demande (pas d'import lourd pour --help)"""
+    global _app
+    if _app is None:
+        from app import create_app
+        _app = create_app()
+    return _app
 
 
 @click.group()
@@ -18,25 +28,28 @@ def cli():
 
 @cli.command('init-db')
 def init_db():
-    """Initialise la base de données"""
+    """Crée ou met à jour le schéma de la base de données"""
+    from app import schema
     click.echo("🔧 Initialisation de la base de données...")
-    with app.app_context():
-        db.create_all()
-        click.echo("✅ Base de données initialisée avec succès!")
+    with get_app().app_context():
+        changes = schema.upgrade(echo=click.echo)
+        click.echo(f"✅ Base de données initialisée avec succès! ({changes} modification(s))")
 
 
 @cli.command('test-connection')
 def test_connection():
     """Teste la connexion à la base de données"""
+    from app import db, sharding
+    from app.models import User, Game
     click.echo("🔌 Test de connexion à la base de données...")
     try:
-        with app.app_context():
+        with get_app().app_context():
             result = db.session.execute(db.text('SELECT 1')).fetchone()
             if result:
                 click.echo("✅ Connexion à la base de données réussie!")
                 
                 users_count = User.query.count()
-                games_count = Game.query.count()
+                games_count = sharding.count(db.select(db.func.count(Game.id)))
                 
                 click.echo(f"📊 Données actuelles:")
                 click.echo(f"   - {users_count} utilisateur(s)")
@@ -50,13 +63,16 @@ def test_connection():
 @cli.command()
 def stats():
     """Affiche les statistiques globales"""
-    with app.app_context():
+    from app import db, sharding
+    from app.models import User, Game
+    with get_app().app_context():
         total_users = User.query.count()
         total_guests = User.query.filter_by(is_guest=True).count()
         total_registered = total_users - total_guests
-        total_games = Game.query.count()
-        finished_games = Game.query.filter_by(status='finished').count()
-        ongoing_games = Game.query.filter_by(status='ongoing').count()
+        count_games = db.select(db.func.count(Game.id))
+        total_games = sharding.count(count_games)
+        finished_games = sharding.count(count_games.filter_by(status='finished'))
+        ongoing_games = sharding.count(count_games.filter_by(status='ongoing'))
         
         click.echo("\n📊 Statistiques globales de Battle of Roles")
         click.echo("=" * 60)
@@ -72,5 +88,328 @@ def stats():
         click.echo("=" * 60)
 
 
+def _echo_progress(done, total):
+    click.echo(f"   ... {done}/{total}")
+
+
+@cli.command('purge-guests')
+@click.option('--chunk-size', default=500, show_default=True, help='Taille des lots')
+def purge_guests(chunk_size):
+    """Supprime tous les invités et leurs parties"""
+    from app import bulk
+    with get_app().app_context():
+        users, games = bulk.purge_guests(chunk_size=chunk_size, progress=_echo_progress)
+        click.echo(f"✅ {users} invité(s) et {games} partie(s) supprimés")
+
+
+@cli.command('purge-waiting')
+@click.option('--chunk-size', default=500, show_default=True, help='Taille des lots')
+def purge_waiting(chunk_size):
+    """Supprime les parties en attente d'adversaire"""
+    from app import bulk
+    with get_app().app_context():
+        games = bulk.purge_waiting_games(chunk_size=chunk_size, progress=_echo_progress)
+        click.echo(f"✅ {games} partie(s) en attente supprimée(s)")
+
+
+@cli.command('recompute-ratings')
+@click.option('--chunk-size', default=10000, show_default=True, help='Taille des lots')
+def recompute_ratings(chunk_size):
+    """Recalcule tous les classements Elo à partir de l'historique des parties"""
+    import time
+    from app import rating
+    
+    click.echo("📈 Recalcul des classements Elo...")
+    with get_app().app_context():
+        started = time.perf_counter()
+        games, players = rating.recompute_all(
+            chunk_size=chunk_size,
+            progress=lambda done: click.echo(f"   ... {done} partie(s)")
+        )
+        elapsed = time.perf_counter() - started
+        click.echo(f"✅ {games} partie(s) rejouée(s), {players} joueur(s) classé(s) en {elapsed:.2f} s")
+
+
+@cli.command('backfill-profiles')
+@click.option('--chunk-size', default=500, show_default=True, help='Parties par lot')
+def backfill_profiles(chunk_size):
+    """Recalcule les statistiques de profil à partir de l'historique des tours"""
+    import time
+    from app import profiles
+    
+    click.echo("👤 Recalcul des statistiques de profil...")
+    with get_app().app_context():
+        started = time.perf_counter()
+        games, turns = profiles.backfill(
+            chunk_size=chunk_size,
+            progress=lambda games, turns: click.echo(f"   ... {games} partie(s), {turns} tour(s)")
+        )
+        elapsed = time.perf_counter() - started
+        click.echo(f"✅ {games} partie(s) et {turns} tour(s) comptés en {elapsed:.2f} s")
+
+
+@cli.command('create-tournament')
+@click.argument('name')
+@click.option('--format', 'format_', type=click.Choice(['swiss', 'elimination']), default='swiss', show_default=True)
+@click.option('--players', type=int, default=None, help='Nombre de joueurs (meilleurs Elo), tous par défaut')
+def create_tournament(name, format_, players):
+    """Crée un tournoi avec les joueurs inscrits et lance la première ronde"""
+    from app import db, tournament
+    from app.models import User
+    with get_app().app_context():
+        query = db.select(User.id).where(User.is_guest.is_(False)).order_by(User.rating.desc())
+        if players:
+            query = query.limit(players)
+        user_ids = db.session.execute(query).scalars().all()
+        
+        item = tournament.create_tournament(name, format_, user_ids)
+        click.echo(f"✅ Tournoi #{item.id} « {item.name} » lancé: {len(user_ids)} joueur(s), "
+                   f"{item.total_rounds} ronde(s)")
+
+
+@cli.command('sweep-games')
+def sweep_games():
+    """Clôt les parties dont le délai de tour est dépassé (forfait ou abandon)"""
+    from app.scheduler import sweep
+    with get_app().app_context():
+        closed, forfeits = sweep(get_app().config['TURN_TIMEOUT'])
+        click.echo(f"✅ {closed} partie(s) clôturée(s), dont {len(forfeits)} par forfait")
+
+
+@cli.command('replay-game')
+@click.argument('game_id', type=int)
+def replay_game(game_id):
+    """Rejoue le journal d'événements d'une partie et le compare à la table games"""
+    from app import db, events
+    from app.models import Game
+    with get_app().app_context():
+        game = db.session.get(Game, game_id)
+        if game is None:
+            click.echo(f"❌ Partie #{game_id} introuvable")
+            return
+        
+        state = events.GameFold()
+        for event, state in events.replay(game_id):
+            joker = ' 🃏' if event.joker else ''
+            line = f"   #{event.seq:<4} tour {state.turn_number:<3} P{event.player} {event.card}{joker}"
+            if state.winner is not None:
+                line += f"  → {state.card1} vs {state.card2}: {state.score1}-{state.score2}"
+            click.echo(line)
+        
+        if (state.score1, state.score2) == (game.score1, game.score2):
+            click.echo(f"✅ {state.seq} événement(s), score {state.score1}-{state.score2} conforme")
+        else:
+            click.echo(f"❌ Journal {state.score1}-{state.score2}, table games {game.score1}-{game.score2}")
+
+
+def _bench_game(app, rounds=50):
+    """Joue une partie complète entre deux invités, retourne le nombre de coups"""
+    import random
+    p1, p2 = app.test_client(), app.test_client()
+    p1.get('/guest')
+    p2.get('/guest')
+    p1.get('/lobby')
+    game_url = p2.get('/lobby').location
+    game_id = int(game_url.rstrip('/').rsplit('/', 1)[-1])
+    
+    moves = 0
+    for _ in range(rounds):
+        for client in (p1, p2):
+            client.post(f'/api/game/{game_id}/play', json={'card': random.choice(['Mage', 'Chevalier', 'Loup'])})
+            moves += 1
+        if p1.get(f'/api/game/{game_id}/state').get_json()['status'] != 'ongoing':
+            break
+    return moves
+
+
+@cli.command('bench-games')
+@click.option('--games', default=100, show_default=True, help='Nombre de parties jouées')
+@click.option('--backend', type=click.Choice(['mysql', 'sqlite', 'memory']), default=None,
+              help='Moteur de stockage (par défaut : STORAGE_BACKEND)')
+def bench_games(games, backend):
+    """Joue des parties complètes via le client de test et mesure le débit"""
+    import contextlib
+    import time
+    from app import create_app, schema
+    from config import Config
+    
+    config_class = Config
+    if backend:
+        config_class = type('BenchConfig', (Config,), {'STORAGE_BACKEND': backend})
+    app = create_app(config_class)
+    with app.app_context():
+        schema.upgrade(echo=lambda message: None)
+    
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        moves = sum(_bench_game(app) for _ in range(games))
+    elapsed = time.perf_counter() - started
+    
+    click.echo(f"🎮 {games} partie(s), {moves} coup(s) en {elapsed:.2f} s "
+               f"({app.config['STORAGE_BACKEND']}: {games / elapsed:.1f} parties/s, "
+               f"{elapsed / moves * 1000:.2f} ms/coup)")
+
+
+def _measure_listing(load, runs):
+    """
+    Charge une liste comme le ferait une requête : durée, pic mémoire et
+    passages du ramasse-miettes (session libérée à chaque tour)
+    """
+    import gc
+    import time
+    import tracemalloc
+    from app import db
+
+    db.session.remove()
+    started = time.perf_counter()
+    for _ in range(runs):
+        load()
+        db.session.remove()
+    elapsed = (time.perf_counter() - started) / runs
+
+    gc.collect()
+    collections = sum(generation['collections'] for generation in gc.get_stats())
+    tracemalloc.start()
+    for _ in range(runs):
+        load()
+        db.session.remove()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = sum(generation['collections'] for generation in gc.get_stats()) - collections
+    return elapsed, peak, collections
+
+
+@cli.command('bench-listings')
+@click.option('--games', default=5000, show_default=True, help='Nombre de parties listées')
+@click.option('--runs', default=5, show_default=True, help='Requêtes simulées par variante')
+def bench_listings(games, runs):
+    """Compare objets ORM et lignes légères (readmodels) sur une grande liste de parties"""
+    from datetime import datetime, timedelta
+    from app import create_app, db, readmodels, schema, sharding
+    from app.models import User, Game
+    from app.utils import format_game_result
+    from config import Config
+
+    app = create_app(type('BenchConfig', (Config,), {'STORAGE_BACKEND': 'memory'}))
+    with app.app_context():
+        schema.upgrade(echo=lambda message: None)
+        now = datetime.utcnow()
+        sharding.bulk_insert(User, [
+            {'username': f'bench_{n}', 'is_guest': False, 'rating': 1200.0, 'wins': 0, 'games_played': 0}
+            for n in range(200)
+        ])
+        sharding.insert_games([
+            {'player1_id': n % 200 + 1, 'player2_id': (n + 1) % 200 + 1, 'score1': 3, 'score2': n % 3,
+             'status': 'finished', 'created_at': now, 'finished_at': now - timedelta(seconds=n)}
+            for n in range(games)
+        ])
+        db.session.commit()
+
+        def load_orm():
+            items = sharding.merge_sorted(
+                db.select(Game).filter_by(status='finished').order_by(Game.finished_at.desc()),
+                key=lambda game: game.finished_at, reverse=True
+            )
+            return [format_game_result(game) for game in items]
+
+        def load_rows():
+            items = readmodels.games(
+                Game.status == 'finished', order_by=(Game.finished_at.desc(),),
+                key=lambda row: row.finished_at, reverse=True
+            )
+            return [format_game_result(game) for game in items]
+
+        click.echo(f"📋 {games} partie(s), {runs} requête(s) par variante:")
+        for label, load in (('objets ORM', load_orm), ('readmodels', load_rows)):
+            elapsed, peak, collections = _measure_listing(load, runs)
+            click.echo(f"   - {label:<11}: {elapsed * 1000:.1f} ms/requête, "
+                       f"pic {peak / 1024:.0f} Kio ({peak / games:.0f} o/partie), "
+                       f"{collections} passage(s) du ramasse-miettes")
+
+
+@cli.command('bench-sessions')
+@click.option('--requests', 'count', default=20000, show_default=True, help='Requêtes simulées par stockage')
+def bench_sessions(count):
+    """Mesure le coût de session d'une requête de consultation et la taille du cookie"""
+    import secrets
+    import tempfile
+    import time
+    from flask import request
+    from app import create_app, sessions
+    from config import Config
+
+    # Session type d'un joueur connecté (Flask-Login + Flask-WTF)
+    payload = {'_user_id': '4242', '_fresh': False, '_id': secrets.token_hex(64), 'csrf_token': secrets.token_hex(20)}
+
+    click.echo(f"🍪 {count} requête(s) de consultation par stockage:")
+    for backend in sessions.BACKENDS:
+        with tempfile.TemporaryDirectory() as directory:
+            app = create_app(type('BenchConfig', (Config,), {
+                'STORAGE_BACKEND': 'memory',
+                'SESSION_BACKEND': backend,
+                'SESSION_FILE': os.path.join(directory, 'sessions.db'),
+            }))
+            interface = app.session_interface
+
+            with app.test_request_context('/'):
+                session = interface.open_session(app, request)
+                session.update(payload)
+                response = app.response_class()
+                interface.save_session(app, session, response)
+                cookie = response.headers['Set-Cookie'].split(';', 1)[0].split('=', 1)[1]
+
+            with app.test_request_context('/', headers={'Cookie': f'session={cookie}'}):
+                started = time.perf_counter()
+                for _ in range(count):
+                    session = interface.open_session(app, request)
+                    session.get('_user_id')
+                    interface.save_session(app, session, app.response_class())
+                elapsed = time.perf_counter() - started
+
+        click.echo(f"   - {backend:<6}: {elapsed / count * 1e6:.1f} µs/requête, cookie de {len(cookie)} octets")
+
+
+STARTUP_SNIPPET = (
+    "import time; t0 = time.perf_counter(); "
+    "from app import create_app; create_app(); "
+    "print((time.perf_counter() - t0) * 1000)"
+)
+
+# Socle incompressible : import des frameworks seuls, sans l'application
+FRAMEWORK_SNIPPET = (
+    "import time; t0 = time.perf_counter(); "
+    "import flask, flask_sqlalchemy, flask_login; "
+    "print((time.perf_counter() - t0) * 1000)"
+)
+
+
+def _time_snippet(snippet, runs, cwd):
+    """Exécute un extrait dans des processus neufs et retourne les durées (ms)"""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', snippet],
+            cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+@cli.command('bench-startup')
+@click.option('--runs', default=10, show_default=True, help='Nombre de démarrages à froid')
+def bench_startup(runs):
+    """Mesure le temps de démarrage à froid d'un worker (import + create_app)"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    framework = _time_snippet(FRAMEWORK_SNIPPET, runs, root)
+    startup = _time_snippet(STARTUP_SNIPPET, runs, root)
+    
+    click.echo(f"⏱️  Démarrage à froid sur {runs} processus (médiane):")
+    click.echo(f"   - frameworks seuls: {statistics.median(framework):.1f} ms")
+    click.echo(f"   - create_app complet: {statistics.median(startup):.1f} ms "
+               f"(min {min(startup):.1f}, max {max(startup):.1f})")
+    click.echo(f"   - part de l'application: "
+               f"{statistics.median(startup) - statistics.median(framework):.1f} ms")
+
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
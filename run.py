@@ -3,8 +3,12 @@ Point d'entrée principal du jeu Battle of Roles
 Lance le serveur Flask
 """
 from app import create_app
+from app.scheduler import scheduler
 
 app = create_app()
 
+if app.config['DEADLINE_SCHEDULER']:
+    scheduler.start(app)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
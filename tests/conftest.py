@@ -0,0 +1,69 @@
+"""
+Fixtures communes : application sur des fichiers SQLite temporaires
+(base globale et shards de parties)
+"""
+import pytest
+from app import create_app, db
+from app.models import User
+from config import Config
+
+
+GAME_SHARDS = 3
+
+
+def make_app(path, game_shards=GAME_SHARDS, **options):
+    """Application sur une base SQLite fichier (et ses shards) à `path`"""
+    config = type('TestConfig', (Config,), {
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'STORAGE_BACKEND': 'sqlite',
+        'SQLITE_PATH': str(path),
+        'GAME_SHARDS': game_shards,
+        'GAME_SHARD_URIS': [],
+        'AUTO_CREATE_SCHEMA': True,
+        'SESSION_BACKEND': 'cookie',
+        **options,
+    })
+    return create_app(config)
+
+
+@pytest.fixture
+def app(tmp_path):
+    return make_app(tmp_path / 'battle.db')
+
+
+@pytest.fixture
+def context(app):
+    """
+    Contexte d'application pour accéder à la base depuis le test
+
+    Les requêtes des clients de test ouvrent chacune le leur : ne pas les
+    émettre sous ce contexte, qui partagerait g (utilisateur connecté).
+    """
+    with app.app_context():
+        yield
+        db.session.remove()
+
+
+@pytest.fixture
+def players(app):
+    """Quatre joueurs enregistrés (mot de passe 'secret')"""
+    with app.app_context():
+        users = []
+        for name in ('alice', 'bob', 'carol', 'dave'):
+            user = User(username=name, rating=1200)
+            user.set_password('secret')
+            db.session.add(user)
+            users.append(user)
+        db.session.commit()
+        return [user.id for user in users]
+
+
+@pytest.fixture
+def login(app):
+    """Retourne un client de test connecté sous le nom donné"""
+    def login(username):
+        client = app.test_client()
+        client.post('/login', data={'username': username, 'password': 'secret'})
+        return client
+    return login
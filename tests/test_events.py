@@ -0,0 +1,39 @@
+"""
+Journal d'événements (mode EVENT_SOURCING)
+"""
+from datetime import datetime
+import pytest
+from sqlalchemy import select, update
+from app import db, events
+from app.models import Game, GameEvent
+from tests.conftest import make_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return make_app(tmp_path / 'battle.db', EVENT_SOURCING=True)
+
+
+def test_seq_conflict_keeps_the_transaction(app, players, context, monkeypatch):
+    game = Game(player1_id=players[0], player2_id=players[1], status='ongoing')
+    db.session.add(game)
+    db.session.commit()
+    game_id = game.id
+    events.play(game_id, 1, 'Mage', False)
+    db.session.commit()
+
+    # Écriture de l'appelant avant le coup : elle doit survivre au conflit
+    marker = datetime(2000, 1, 1)
+    db.session.execute(update(Game).where(Game.id == game_id).values(last_activity_at=marker))
+
+    # État périmé : le coup de P1 n'est pas vu, l'INSERT prend le même numéro
+    monkeypatch.setattr(events, 'load_state', lambda game_id: events.GameFold())
+    state, error = events.play(game_id, 2, 'Loup', False)
+    db.session.commit()
+
+    assert error is None
+    assert (state.seq, state.card1, state.card2, state.winner) == (2, 'Mage', 'Loup', 2)
+    assert db.session.execute(select(GameEvent.seq, GameEvent.card).order_by(GameEvent.seq)).all() == [
+        (1, 'Mage'), (2, 'Loup')
+    ]
+    assert db.session.execute(select(Game.last_activity_at).where(Game.id == game_id)).scalar() == marker
@@ -0,0 +1,61 @@
+"""
+Coups joués en parallèle sur plusieurs parties
+"""
+import itertools
+import threading
+from sqlalchemy import select
+from app import db
+from app.models import User, Game
+
+
+GAMES = 8
+CARDS = ('Mage', 'Chevalier', 'Loup')
+
+
+def _create_games(app, count):
+    """Crée `count` parties en cours entre joueurs distincts, retourne (game_id, nom P1, nom P2)"""
+    with app.app_context():
+        games = []
+        for n in range(count):
+            users = []
+            for name in (f'p{n}a', f'p{n}b'):
+                user = User(username=name, rating=1200)
+                user.set_password('secret')
+                db.session.add(user)
+                users.append(user)
+            db.session.flush()
+            game = Game(player1_id=users[0].id, player2_id=users[1].id, status='ongoing')
+            db.session.add(game)
+            db.session.flush()
+            games.append((game.id, users[0].username, users[1].username))
+        db.session.commit()
+        db.session.remove()
+        return games
+
+
+def test_concurrent_games_are_all_scored(app, login):
+    games = _create_games(app, GAMES)
+    errors = []
+
+    def play(game_id, name1, name2, offset):
+        client1, client2 = login(name1), login(name2)
+        cards = itertools.cycle(CARDS[offset % 3:] + CARDS[:offset % 3])
+        for _ in range(30):
+            for client, card in ((client1, next(cards)), (client2, next(cards))):
+                response = client.post(f'/api/game/{game_id}/play', json={'card': card})
+                if response.status_code != 200:
+                    errors.append((game_id, response.status_code, response.get_json()))
+            if client1.get(f'/api/game/{game_id}/state').get_json()['status'] == 'finished':
+                return
+
+    threads = [threading.Thread(target=play, args=(*game, n)) for n, game in enumerate(games)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with app.app_context():
+        rows = db.session.execute(select(Game.status, Game.score1, Game.score2)).all()
+        assert [row.status for row in rows] == ['finished'] * GAMES
+        assert all(max(row.score1, row.score2) == 3 for row in rows)
@@ -0,0 +1,65 @@
+"""
+Recalcul des compteurs de profil pendant que des parties se jouent
+"""
+import threading
+from sqlalchemy import select
+from app import db, profiles
+from app.models import Game, ProfileStats, HeadToHead
+
+
+def _counters():
+    return (
+        sorted(tuple(row) for row in db.session.execute(select(ProfileStats.__table__))),
+        sorted(tuple(row) for row in db.session.execute(select(HeadToHead.__table__))),
+    )
+
+
+def _play(clients, game_id, turns):
+    for card1, card2 in turns:
+        assert clients[0].post(f'/api/game/{game_id}/play', json={'card': card1}).status_code == 200
+        assert clients[1].post(f'/api/game/{game_id}/play', json={'card': card2}).status_code == 200
+
+
+def test_backfill_keeps_moves_played_meanwhile(app, players, login):
+    alice, bob, carol, dave = (login(name) for name in ('alice', 'bob', 'carol', 'dave'))
+    with app.app_context():
+        games = []
+        for player1, player2 in ((0, 1), (2, 3), (0, 2), (1, 3)):
+            game = Game(player1_id=players[player1], player2_id=players[player2], status='ongoing')
+            db.session.add(game)
+            db.session.commit()
+            games.append(game.id)
+        db.session.remove()
+
+    # Deux parties terminées, deux en cours avec des tours déjà résolus
+    _play((alice, bob), games[0], [('Loup', 'Mage')] * 3)
+    _play((carol, dave), games[1], [('Mage', 'Loup'), ('Mage', 'Mage'), ('Mage', 'Chevalier')] * 2)
+    _play((alice, carol), games[2], [('Chevalier', 'Loup')])
+    _play((bob, dave), games[3], [('Loup', 'Loup')])
+
+    started, resume = threading.Event(), threading.Event()
+
+    def pause(games_seen, turns_seen):
+        if not started.is_set():
+            started.set()
+            resume.wait(10)
+
+    def run_backfill():
+        with app.app_context():
+            profiles.backfill(chunk_size=1, progress=pause)
+            db.session.remove()
+
+    thread = threading.Thread(target=run_backfill)
+    thread.start()
+    assert started.wait(10)
+    # Coups joués entre deux lots : une partie se termine, l'autre avance
+    _play((alice, carol), games[2], [('Chevalier', 'Loup')] * 2)
+    _play((bob, dave), games[3], [('Mage', 'Loup')])
+    resume.set()
+    thread.join()
+
+    with app.app_context():
+        live = _counters()
+        profiles.backfill(chunk_size=2)
+        assert _counters() == live
+        assert sum(row[4] + row[5] + row[6] for row in live[0]) == 2 * (3 + 6 + 3 + 2)
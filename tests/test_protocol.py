@@ -0,0 +1,48 @@
+"""
+Protocole d'état versionné (?since=<version>)
+"""
+from app import db
+from app.models import Game
+
+
+def _new_game(app, players):
+    with app.app_context():
+        game = Game(player1_id=players[0], player2_id=players[1], status='ongoing')
+        db.session.add(game)
+        db.session.commit()
+        game_id = game.id
+        db.session.remove()
+    return game_id
+
+
+def test_since_protocol(app, players, login):
+    game_id = _new_game(app, players)
+    alice, bob = login('alice'), login('bob')
+    url = f'/api/game/{game_id}/state'
+
+    # Version inconnue : état complet, noms de champs compacts
+    payload = alice.get(f'{url}?since=1').get_json()
+    assert payload['full'] == {
+        's': 'ongoing', 'a': 0, 'b': 0, 'j1': False, 'j2': False, 'n1': 'alice', 'n2': 'bob',
+        'i1': players[0], 'i2': players[1], 'w': 'both', 't': None,
+    }
+    version = payload['v']
+
+    # Marqueur inchangé : 304 sans corps, pour chacun des joueurs
+    for client in (alice, bob):
+        response = client.get(f'{url}?since={version}')
+        assert (response.status_code, response.data) == (304, b'')
+
+    # Après un coup : seuls les champs modifiés
+    assert bob.post(f'/api/game/{game_id}/play', json={'card': 'Loup'}).status_code == 200
+    payload = alice.get(f'{url}?since={version}').get_json()
+    assert payload['v'] != version
+    assert payload['d'] == {'w': 1, 't': [1, None, 'Loup', None, False]}
+
+    assert alice.post(f'/api/game/{game_id}/play', json={'card': 'Mage'}).status_code == 200
+    payload = bob.get(f"{url}?since={payload['v']}").get_json()
+    assert payload['d'] == {'b': 1, 'w': 'both', 't': [1, 'Mage', 'Loup', players[1], False]}
+
+    # Sans since : ancien format complet
+    assert alice.get(url).get_json()['player2'] == 'bob'
+    assert login('carol').get(f'{url}?since={version}').status_code == 403
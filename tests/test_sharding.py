@@ -0,0 +1,143 @@
+"""
+Partitionnement des parties sur plusieurs fichiers SQLite
+"""
+import sqlite3
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from app import db, bulk, readmodels, sharding
+from app.models import User, Game, Turn
+from tests.conftest import GAME_SHARDS, make_app
+
+
+def _shard_file(shard):
+    """Chemin du fichier SQLite d'un shard"""
+    return db.engines[shard].url.database
+
+
+def _ids_in_file(shard, table, column='id'):
+    """IDs présents dans une table du fichier d'un shard, lus hors SQLAlchemy"""
+    connection = sqlite3.connect(_shard_file(shard))
+    try:
+        return {row[0] for row in connection.execute(f"SELECT {column} FROM {table}")}
+    finally:
+        connection.close()
+
+
+def _insert_finished_games(players, count):
+    now = datetime.utcnow()
+    sharding.insert_games([
+        {
+            'player1_id': players[n % 2], 'player2_id': players[2 + n % 2],
+            'status': 'finished', 'score1': 3, 'score2': n % 3,
+            'created_at': now, 'finished_at': now - timedelta(minutes=n),
+        }
+        for n in range(count)
+    ])
+    db.session.commit()
+
+
+def test_shards_are_separate_files(app, context):
+    files = {_shard_file(shard) for shard in sharding.shard_ids()}
+    assert len(files) == GAME_SHARDS
+    assert db.engine.url.database not in files
+
+
+def test_games_routed_by_id(app, players, context):
+    _insert_finished_games(players, 10)
+
+    game_ids = set(db.session.execute(select(Game.id)).scalars())
+    assert len(game_ids) == 10
+    for shard in sharding.shard_ids():
+        stored = _ids_in_file(shard, 'games')
+        assert stored == {game_id for game_id in game_ids if sharding.shard_for(game_id) == shard}
+        assert stored, "les parties sont réparties à tour de rôle"
+
+
+def test_insert_games_ids_are_unique(app, players, context):
+    for _ in range(3):
+        _insert_finished_games(players, 4)
+
+    game_ids = db.session.execute(select(Game.id)).scalars().all()
+    assert len(game_ids) == len(set(game_ids)) == 12
+
+
+def test_turns_follow_their_game(app, players, login):
+    alice, bob = login('alice'), login('bob')
+    alice.get('/lobby')
+    game_id = int(bob.get('/lobby').location.rsplit('/', 1)[-1])
+
+    for card1, card2 in (('Loup', 'Mage'), ('Mage', 'Chevalier'), ('Chevalier', 'Loup')):
+        assert alice.post(f'/api/game/{game_id}/play', json={'card': card1}).status_code == 200
+        assert bob.post(f'/api/game/{game_id}/play', json={'card': card2}).status_code == 200
+
+    with app.app_context():
+        home = sharding.shard_for(game_id)
+        for shard in sharding.shard_ids():
+            turn_games = _ids_in_file(shard, 'turns', 'game_id')
+            assert turn_games == ({game_id} if shard == home else set())
+
+        game = readmodels.game(game_id)
+        assert (game.status, game.score1, game.score2) == ('finished', 3, 0)
+
+
+def test_refresh_stays_on_its_shard(app, players, context):
+    # Mêmes IDs de tours dans deux shards : un rechargement ne doit lire que le sien
+    for _ in range(GAME_SHARDS):
+        db.session.add(Game(player1_id=players[0], status='ongoing'))
+    db.session.commit()
+    games = {sharding.shard_for(game_id): game_id for game_id in db.session.execute(select(Game.id)).scalars()}
+    first, second = sharding.shard_ids()[:2]
+
+    db.session.add(Turn(game_id=games[second], turn_number=1, player1_card='Loup', player2_card='Loup'))
+    db.session.commit()
+
+    turn = Turn(game_id=games[first], turn_number=1, player1_card='Mage')
+    db.session.add(turn)
+    db.session.commit()
+
+    assert (turn.game_id, turn.player1_card, turn.player2_card) == (games[first], 'Mage', None)
+
+
+def test_cross_shard_reads_are_merged(app, players, context):
+    _insert_finished_games(players, 9)
+
+    rows = readmodels.games(
+        Game.status == 'finished', order_by=(Game.finished_at.desc(),),
+        key=lambda row: row.finished_at, reverse=True, limit=5
+    )
+    finished_at = [row.finished_at for row in rows]
+    assert len(rows) == 5
+    assert finished_at == sorted(finished_at, reverse=True)
+    assert len({sharding.shard_for(row.id) for row in rows}) > 1
+    assert all(row.player1.username in ('alice', 'bob') for row in rows)
+
+    assert sharding.count(select(func.count(Game.id)).where(Game.status == 'finished')) == 9
+
+
+def test_bulk_delete_spans_shards(app, players, context):
+    _insert_finished_games(players, 9)
+    alice = players[0]
+
+    deleted_users, deleted_games = bulk.delete_users([alice], chunk_size=2)
+
+    assert (deleted_users, deleted_games) == (1, 5)
+    for shard in sharding.shard_ids():
+        for game_id in _ids_in_file(shard, 'games'):
+            assert db.session.get(Game, game_id).player1_id != alice
+    assert sharding.count(select(func.count(Game.id))) == 4
+
+
+def test_unsharded_app_after_sharded_one(app, tmp_path):
+    # db.session est commun au processus : chaque application garde son routage
+    for current in (make_app(tmp_path / 'plain.db', game_shards=0), app):
+        with current.app_context():
+            user = User(username='erin')
+            user.set_password('secret')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Game(player1_id=user.id, status='waiting'))
+            db.session.commit()
+
+            assert isinstance(db.session(), sharding.RoutingSession) == (current is app)
+            assert sharding.count(select(func.count(Game.id))) == 1
+            db.session.remove()
@@ -0,0 +1,152 @@
+"""
+Moteur de tournois : tableau d'élimination, appariements suisses,
+passage de ronde
+"""
+from sqlalchemy import select, update
+from app import db, tournament
+from app.models import User, Game, Tournament, TournamentEntry
+
+
+def _seeded_players(count, prefix='seed'):
+    """Joueurs aux classements décroissants : le i-ème est tête de série i"""
+    users = []
+    for n in range(count):
+        user = User(username=f'{prefix}{n + 1}', rating=2000 - 10 * n)
+        db.session.add(user)
+        users.append(user)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def _seeds(tournament_id):
+    return dict(db.session.execute(
+        select(TournamentEntry.user_id, TournamentEntry.seed).where(TournamentEntry.tournament_id == tournament_id)
+    ).all())
+
+
+def _entries(tournament_id):
+    return {
+        row.seed: row for row in db.session.execute(
+            select(TournamentEntry.seed, TournamentEntry.points, TournamentEntry.byes, TournamentEntry.eliminated)
+            .where(TournamentEntry.tournament_id == tournament_id)
+        )
+    }
+
+
+def _round_games(tournament_id):
+    """Parties en cours de la ronde courante"""
+    item = db.session.get(Tournament, tournament_id)
+    return db.session.execute(
+        select(Game.id, Game.player1_id, Game.player2_id)
+        .where(Game.tournament_id == tournament_id, Game.tournament_round == item.current_round,
+               Game.status == 'ongoing')
+    ).all()
+
+
+def _finish(game_id, winner_id):
+    """Termine une partie de tournoi (winner_id None : abandon)"""
+    db.session.execute(
+        update(Game).where(Game.id == game_id)
+        .values(status='finished' if winner_id else 'abandoned')
+        .execution_options(synchronize_session=False)
+    )
+    tournament.record_results([(game_id, winner_id)])
+    db.session.commit()
+
+
+def _play_round(tournament_id, pick):
+    """Termine toutes les parties de la ronde, vainqueur choisi par pick(joueur 1, joueur 2)"""
+    for game in _round_games(tournament_id):
+        _finish(game.id, pick(game.player1_id, game.player2_id))
+
+
+def test_bracket_order():
+    assert tournament._bracket_order(2) == [1, 2]
+    assert tournament._bracket_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+
+    order = tournament._bracket_order(16)
+    assert sorted(order) == list(range(1, 17))
+    assert all(order[i] + order[i + 1] == 17 for i in range(0, 16, 2))
+    # Les deux premières têtes de série sont dans des moitiés opposées
+    assert 1 in order[:8] and 2 in order[8:]
+
+
+def test_elimination_first_round_byes_go_to_top_seeds(context):
+    item = tournament.create_tournament('Coupe', 'elimination', _seeded_players(5))
+    seeds = _seeds(item.id)
+
+    assert item.total_rounds == 3 and item.current_round == 1
+    games = _round_games(item.id)
+    assert [sorted((seeds[g.player1_id], seeds[g.player2_id])) for g in games] == [[4, 5]]
+    assert {seed: entry.byes for seed, entry in _entries(item.id).items()} == {1: 1, 2: 1, 3: 1, 4: 0, 5: 0}
+
+
+def test_elimination_byes_are_never_given_twice(context):
+    for count in range(3, 10):
+        item = tournament.create_tournament(f'Coupe {count}', 'elimination', _seeded_players(count, f'c{count}-'))
+        seeds = _seeds(item.id)
+        size = 2 ** item.total_rounds
+        round_one_byes = [seed for seed, entry in _entries(item.id).items() if entry.byes]
+        assert sorted(round_one_byes) == list(range(1, size - count + 1))
+
+        # La meilleure tête de série gagne toujours
+        while db.session.get(Tournament, item.id).status == 'running':
+            _play_round(item.id, lambda p1, p2: min((p1, p2), key=seeds.get))
+
+        item = db.session.get(Tournament, item.id)
+        entries = _entries(item.id)
+        assert item.winner_id == next(uid for uid, seed in seeds.items() if seed == 1)
+        assert all(entry.byes <= 1 for entry in entries.values())
+        assert [seed for seed, entry in entries.items() if not entry.eliminated] == [1]
+        db.session.remove()
+
+
+def test_swiss_avoids_rematches(context):
+    item = tournament.create_tournament('Suisse', 'swiss', _seeded_players(4))
+    seeds = _seeds(item.id)
+
+    while db.session.get(Tournament, item.id).status == 'running':
+        _play_round(item.id, lambda p1, p2: min((p1, p2), key=seeds.get))
+
+    pairs = [
+        frozenset((p1, p2)) for p1, p2 in db.session.execute(
+            select(Game.player1_id, Game.player2_id).where(Game.tournament_id == item.id)
+        )
+    ]
+    assert len(pairs) == 4
+    assert len(set(pairs)) == len(pairs)
+
+
+def test_swiss_odd_count_gives_one_bye_per_round(context):
+    item = tournament.create_tournament('Suisse impaire', 'swiss', _seeded_players(5))
+    seeds = _seeds(item.id)
+    assert item.total_rounds == 3
+
+    while db.session.get(Tournament, item.id).status == 'running':
+        _play_round(item.id, lambda p1, p2: min((p1, p2), key=seeds.get))
+
+    entries = _entries(item.id)
+    assert sum(entry.byes for entry in entries.values()) == 3
+    assert all(entry.byes <= 1 for entry in entries.values())
+    games = db.session.execute(select(Game.id).where(Game.tournament_id == item.id)).all()
+    # Une victoire ou une exemption rapporte un point
+    assert sum(entry.points for entry in entries.values()) == len(games) + 3
+
+
+def test_round_advances_when_pending_games_reach_zero(context):
+    item = tournament.create_tournament('Rondes', 'swiss', _seeded_players(4))
+    seeds = _seeds(item.id)
+    first, second = _round_games(item.id)
+    assert db.session.get(Tournament, item.id).pending_games == 2
+
+    _finish(first.id, first.player1_id)
+    item = db.session.get(Tournament, item.id)
+    assert (item.current_round, item.pending_games) == (1, 1)
+
+    # Une partie abandonnée compte comme jouée, sans point pour personne
+    _finish(second.id, None)
+    item = db.session.get(Tournament, item.id)
+    assert (item.current_round, item.pending_games) == (2, 2)
+    points = {seed: entry.points for seed, entry in _entries(item.id).items()}
+    assert sum(points.values()) == 1
+    assert points[seeds[first.player1_id]] == 1